@@ -21,12 +21,17 @@
     },
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron_data.xml',
         'views/telegram_config_views.xml',
         'views/telegram_user_views.xml',
         'views/vehicle_views.xml',
         'views/task_manager_views.xml',
         'views/telegram_bot_views.xml',
+        'views/telegram_message_queue_views.xml',
+        'views/telegram_stats_views.xml',
+        'views/telegram_broadcast_views.xml',
         'wizard/quick_task_wizard_views.xml',
+        'wizard/telegram_notify_wizard_views.xml',
         'views/menu_views.xml',
     ],
     'installable': True,
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+
+
+class TaskDashboardController(http.Controller):
+
+    @http.route('/telegram_task_manager/dashboard', type='json', auth='user')
+    def dashboard_data(self, **kwargs):
+        """Cached task/user/vehicle statistics for the current companies"""
+        return request.env['task.dashboard'].get_dashboard_data()
@@ -1,16 +1,23 @@
 # -*- coding: utf-8 -*-
 import logging
-import json
+import time
+from psycopg2 import errors as pg_errors
 from odoo import http, registry, SUPERUSER_ID
 from odoo.http import request
 
+from ..models.telegram_logging import trace_logger as _trace
+
 _logger = logging.getLogger(__name__)
 
+# Attempts at processing an update that lost a race with a concurrent transaction
+MAX_PROCESS_ATTEMPTS = 3
+
 class TelegramWebhook(http.Controller):
     
     @http.route('/telegram/webhook', type='json', auth='none', methods=['POST'], csrf=False)
     def telegram_webhook(self, **kwargs):
         """Handle incoming Telegram webhook updates"""
+        started = time.monotonic()
         try:
             # Get update data
             update = request.httprequest.get_json(force=True)
@@ -18,7 +25,7 @@ class TelegramWebhook(http.Controller):
                 _logger.warning("Empty webhook update received")
                 return {'ok': False, 'error': 'Empty update'}
             
-            _logger.info(f"📨 Webhook update received: {json.dumps(update, indent=2)}")
+            _trace.debug("📨 Webhook update received: %s", update)
             
             # Get database connection
             db_name = request.session.db or 'logistics_bot'
@@ -28,32 +35,47 @@ class TelegramWebhook(http.Controller):
                 env = api.Environment(cr, SUPERUSER_ID, {})
                 
                 # Find active telegram service
-                service = env['telegram.service'].search([('is_running', '=', True)], limit=1)
+                service = env['telegram.service']._get_active_service()
                 if not service:
                     _logger.warning("No active telegram service found")
                     return {'ok': False, 'error': 'Service not running'}
                 
+                # Fast-ack mode: store the update and let the background worker process it
+                if service.fast_ack and 'update_id' in update:
+                    env['telegram.update']._store(service, update)
+                    cr.commit()
+                    env['telegram.stats']._record('webhook', time.monotonic() - started)
+                    return {'ok': True}
+                
                 # Process the update
                 try:
-                    if 'message' in update:
-                        _logger.info("📱 Processing message update")
-                        service._handle_message(env, update['message'])
-                    elif 'callback_query' in update:
-                        _logger.info("🔘 Processing callback update")
-                        service._handle_callback(env, update['callback_query'])
-                    else:
-                        _logger.info(f"ℹ️ Unhandled update type: {list(update.keys())}")
+                    for attempt in range(1, MAX_PROCESS_ATTEMPTS + 1):
+                        try:
+                            service._process_update_once(update)
+                            break
+                        except pg_errors.SerializationFailure:
+                            # e.g. two first messages from the same person: retry on a fresh snapshot
+                            if attempt == MAX_PROCESS_ATTEMPTS:
+                                raise
+                            cr.rollback()
+                            env.invalidate_all()
                     
                     # Commit the transaction
                     cr.commit()
+                    env['telegram.stats']._record('webhook', time.monotonic() - started)
                     
                     return {'ok': True}
                     
                 except Exception as process_error:
-                    _logger.error(f"❌ Error processing update: {process_error}")
+                    _logger.error("❌ Error processing update: %s", process_error)
                     cr.rollback()
+                    if 'update_id' in update:
+                        # Telegram won't redeliver an answered update: keep it for action_retry
+                        env.invalidate_all()
+                        env['telegram.update']._store_failed(service, update, str(process_error))
+                        cr.commit()
                     return {'ok': False, 'error': str(process_error)}
                     
         except Exception as e:
-            _logger.error(f"❌ Webhook error: {e}")
+            _logger.error("❌ Webhook error: %s", e)
             return {'ok': False, 'error': str(e)}
\ No newline at end of file
@@ -4,6 +4,15 @@ from . import telegram_user
 from . import vehicle
 from . import task_manager
 from . import task_report
+from . import task_reminder
+from . import task_dashboard
 from . import telegram_service
 from . import telegram_bot
 from . import privacy_log
+from . import telegram_message_queue
+from . import telegram_rate_limit
+from . import telegram_update
+from . import telegram_stats
+from . import telegram_admin_event
+from . import telegram_broadcast
+from . import telegram_chat
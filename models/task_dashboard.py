@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from datetime import datetime, time as dt_time
+
+from odoo import models, fields, api
+
+from .task_manager import OPEN_STATES
+
+# Seconds dashboard statistics are served from the per-process cache
+PARAM_DASHBOARD_CACHE_SECONDS = 'telegram_task_manager.dashboard_cache_seconds'
+DEFAULT_DASHBOARD_CACHE_SECONDS = 60
+
+# (database, company ids) -> (expiry timestamp, statistics)
+_stats_cache = {}
+_stats_cache_lock = threading.Lock()
+
+
+class TaskDashboard(models.AbstractModel):
+    """Task, user and vehicle statistics for the backend dashboard and the bot's /status"""
+    _name = 'task.dashboard'
+    _description = 'Task Dashboard Statistics'
+
+    @api.model
+    def get_dashboard_data(self):
+        """Statistics for the current companies, cached for a short time per company"""
+        key = (self.env.cr.dbname, tuple(sorted(self.env.companies.ids)))
+        now = time.monotonic()
+        with _stats_cache_lock:
+            cached = _stats_cache.get(key)
+        if cached and cached[0] > now:
+            return dict(cached[1])
+
+        data = self._compute_dashboard_data()
+        ttl = int(self.env['ir.config_parameter'].sudo().get_param(
+            PARAM_DASHBOARD_CACHE_SECONDS, DEFAULT_DASHBOARD_CACHE_SECONDS))
+        with _stats_cache_lock:
+            # Drop expired entries so companies that stop asking don't pile up
+            for stale_key in [k for k, (expiry, _data) in _stats_cache.items() if expiry <= now]:
+                del _stats_cache[stale_key]
+            _stats_cache[key] = (now + ttl, data)
+        return dict(data)
+
+    @api.model
+    def _compute_dashboard_data(self):
+        """Aggregate the statistics with one grouped query per model"""
+        company_domain = [('company_id', 'in', self.env.companies.ids)]
+        tasks_by_state = {}
+        tasks_by_priority = {}
+        overdue_tasks = 0
+        total_tasks = 0
+        for state, priority, is_overdue, count in self.env['task.manager'].sudo()._read_group(
+                company_domain, ['state', 'priority', 'is_overdue'], ['__count']):
+            total_tasks += count
+            tasks_by_state[state] = tasks_by_state.get(state, 0) + count
+            if state in OPEN_STATES:
+                # Priority and overdue figures only make sense for work still to do
+                tasks_by_priority[priority] = tasks_by_priority.get(priority, 0) + count
+                if is_overdue:
+                    overdue_tasks += count
+
+        telegram_users = admin_users = 0
+        for is_admin, count in self.env['telegram.user'].sudo()._read_group([], ['is_admin'], ['__count']):
+            telegram_users += count
+            if is_admin:
+                admin_users += count
+
+        today_start = datetime.combine(fields.Date.context_today(self), dt_time.min)
+        messages_today = self.env['telegram.message.queue'].sudo().search_count([
+            ('state', '=', 'sent'), ('date_sent', '>=', today_start),
+        ])
+
+        return {
+            'total_tasks': total_tasks,
+            'completed_tasks': tasks_by_state.get('completed', 0),
+            'in_progress_tasks': tasks_by_state.get('in_progress', 0),
+            'open_tasks': sum(tasks_by_state.get(state, 0) for state in OPEN_STATES),
+            'overdue_tasks': overdue_tasks,
+            'tasks_by_state': tasks_by_state,
+            'tasks_by_priority': tasks_by_priority,
+            'telegram_users': telegram_users,
+            'admin_users': admin_users,
+            'vehicles': self.env['task.vehicle'].sudo().search_count([]),
+            'messages_today': messages_today,
+            'computed_at': fields.Datetime.to_string(fields.Datetime.now()),
+        }
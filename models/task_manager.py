@@ -2,10 +2,17 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
+from odoo.tools.sql import create_index
+from datetime import timedelta
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# Task states that can still become overdue
+OPEN_STATES = ('draft', 'in_progress')
+# Upper bound of the deadline window flipped by the previous overdue cron run
+PARAM_OVERDUE_LAST_RUN = 'telegram_task_manager.overdue_last_run'
+
 
 class TaskManager(models.Model):
     """Main task management model"""
@@ -57,6 +64,8 @@ class TaskManager(models.Model):
     # Dates
     date_deadline = fields.Datetime(string='Deadline', tracking=True)
     date_start = fields.Datetime(string='Start Date', tracking=True)
+    date_execution = fields.Date(string='Planned Execution Day', tracking=True,
+                                 help="Day the assignee plans to do the task, as answered in Telegram")
     date_completed = fields.Datetime(string='Completed Date', readonly=True)
     
     # Progress
@@ -98,11 +107,20 @@ class TaskManager(models.Model):
     
     # Computed fields
     is_overdue = fields.Boolean(string='Is Overdue', compute='_compute_is_overdue', store=True)
-    days_to_deadline = fields.Integer(string='Days to Deadline', compute='_compute_days_to_deadline')
+    days_to_deadline = fields.Integer(string='Days to Deadline', compute='_compute_days_to_deadline',
+                                      search='_search_days_to_deadline')
     
     # Colors for kanban view
     color = fields.Integer(string='Color Index', default=0)
     
+    def init(self):
+        """Composite index serving the per-user open task lookups of the Telegram bot"""
+        create_index(self.env.cr, 'task_manager_telegram_user_id_state_index',
+                     self._table, ['telegram_user_id', 'state'])
+        # Deadline scans (overdue job, reminders, due-soon filters) only look at open tasks
+        create_index(self.env.cr, 'task_manager_open_date_deadline_index',
+                     self._table, ['date_deadline'], where="state IN ('draft', 'in_progress')")
+
     @api.depends('date_deadline', 'state')
     def _compute_is_overdue(self):
         """Compute if task is overdue"""
@@ -124,14 +142,78 @@ class TaskManager(models.Model):
                 task.days_to_deadline = delta.days
             else:
                 task.days_to_deadline = 0
-    
+
+    def _search_days_to_deadline(self, operator, value):
+        """Translate a days_to_deadline condition into a date_deadline range
+
+        days_to_deadline is the floor of (deadline - now) in days, so
+        "days >= N" means "deadline >= now + N days", and so on. Tasks
+        without a deadline count as 0 days.
+        """
+        if operator not in ('=', '!=', '<', '<=', '>', '>=') or isinstance(value, bool) or not isinstance(value, int):
+            raise UserError(_('Unsupported search on days to deadline: %s %s', operator, value))
+        now = fields.Datetime.now()
+
+        def days_from_now(days):
+            return now + timedelta(days=days)
+
+        if operator in ('>', '>='):
+            first_day = value + 1 if operator == '>' else value
+            domain = [('date_deadline', '>=', days_from_now(first_day))]
+        elif operator in ('<', '<='):
+            end_day = value + 1 if operator == '<=' else value
+            domain = [('date_deadline', '<', days_from_now(end_day))]
+        elif operator == '=':
+            domain = ['&', ('date_deadline', '>=', days_from_now(value)),
+                      ('date_deadline', '<', days_from_now(value + 1))]
+        else:
+            domain = ['|', ('date_deadline', '<', days_from_now(value)),
+                      ('date_deadline', '>=', days_from_now(value + 1))]
+
+        zero_matches = {
+            '=': value == 0, '!=': value != 0,
+            '<': 0 < value, '<=': 0 <= value,
+            '>': 0 > value, '>=': 0 >= value,
+        }[operator]
+        if zero_matches:
+            domain = ['|', ('date_deadline', '=', False)] + domain
+        return domain
+
     @api.model
-    def create(self, vals):
-        """Override create to send Telegram notification"""
-        task = super(TaskManager, self).create(vals)
-        if task.telegram_user_id and task.telegram_user_id.telegram_id:
-            task._send_telegram_notification('created')
-        return task
+    def _cron_update_overdue(self):
+        """Flag open tasks whose deadline passed since the previous run
+
+        is_overdue is only recomputed when a task is written, so deadlines
+        crossing "now" are picked up here with a single UPDATE over the
+        partial deadline index.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        now = fields.Datetime.now()
+        last_run = params.get_param(PARAM_OVERDUE_LAST_RUN)
+        query = """
+            UPDATE task_manager SET is_overdue = true
+             WHERE state IN %s
+               AND date_deadline < %s
+               AND is_overdue IS NOT TRUE
+        """
+        args = [OPEN_STATES, now]
+        if last_run:
+            query += " AND date_deadline >= %s"
+            args.append(fields.Datetime.to_datetime(last_run))
+        self.flush_model(['state', 'date_deadline', 'is_overdue'])
+        self.env.cr.execute(query, args)
+        _logger.info("Flagged %s task(s) as overdue", self.env.cr.rowcount)
+        self.invalidate_model(['is_overdue'])
+        params.set_param(PARAM_OVERDUE_LAST_RUN, fields.Datetime.to_string(now))
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override create to send Telegram notifications (batched for multi-record creates)"""
+        tasks = super(TaskManager, self).create(vals_list)
+        to_notify = tasks.filtered(lambda t: t.telegram_user_id.telegram_id)
+        if to_notify:
+            to_notify._send_telegram_notification('created')
+        return tasks
     
     def write(self, vals):
         """Override write to send Telegram notifications on changes"""
@@ -147,9 +229,9 @@ class TaskManager(models.Model):
         if ('state' in vals and 
             not self.env.context.get('from_action_method') and
             not self.env.context.get('from_telegram')):
-            for task in self:
-                if task.telegram_user_id and task.telegram_user_id.telegram_id:
-                    task._send_telegram_notification('updated')
+            to_notify = self.filtered(lambda t: t.telegram_user_id.telegram_id)
+            if to_notify:
+                to_notify._send_telegram_notification('updated')
         
         # Update completion date (with context to prevent loops)
         if 'state' in vals and vals['state'] == 'completed':
@@ -212,34 +294,33 @@ class TaskManager(models.Model):
         return True
     
     def _send_telegram_notification(self, action):
-        """Send Telegram notification"""
+        """Send Telegram notifications for the tasks in self
+
+        The configuration and service are resolved once for the whole
+        recordset; several tasks for the same Telegram user are announced
+        in a single digest message.
+        """
         try:
-            # Get active telegram configuration
-            telegram_config = self.env['telegram.config'].search([('active', '=', True)], limit=1)
-            if not telegram_config or not telegram_config.bot_token:
-                _logger.warning("No active Telegram configuration found")
+            tasks = self.filtered(lambda t: t.telegram_user_id.telegram_id)
+            for task in self - tasks:
+                _logger.warning("No telegram user assigned to task: %s", task.title)
+            if not tasks:
                 return False
-            
-            # Check if task has telegram user assigned
-            if self.telegram_user_id and self.telegram_user_id.telegram_id:
-                telegram_user = self.telegram_user_id
-                
-                # Find running telegram service
-                telegram_service = self.env['telegram.service'].search([
-                    ('bot_token', '=', telegram_config.bot_token),
-                    ('is_running', '=', True)
-                ], limit=1)
-                
-                if telegram_service:
-                    # Use proper notification method with buttons
-                    telegram_service.send_task_notification(self)
-                    self.telegram_message_sent = True
-                    _logger.info("Telegram notification sent to %s", telegram_user.name)
-                else:
-                    _logger.warning("No running Telegram service found")
+
+            telegram_service = self.env['telegram.service']._get_notification_service()
+            if not telegram_service:
+                _logger.warning("No active Telegram configuration with a running service found")
+                return False
+
+            # Use proper notification method with buttons
+            if len(tasks) == 1:
+                telegram_service.send_task_notification(tasks)
             else:
-                _logger.warning("No telegram user assigned to task: %s", self.title)
-            
+                telegram_service.send_task_notifications(tasks)
+            tasks.telegram_message_sent = True
+            _logger.info("Telegram notifications sent for %s task(s)", len(tasks))
+            return True
+
         except Exception as e:
             _logger.error(f"Error sending Telegram notification: {str(e)}")
             return False
@@ -288,11 +369,14 @@ class TaskCategory(models.Model):
     task_count = fields.Integer(string='Task Count', compute='_compute_task_count')
     
     def _compute_task_count(self):
-        """Compute number of tasks in this category"""
+        """Compute number of tasks per category with one grouped query"""
+        counts = {
+            category.id: count
+            for category, count in self.env['task.manager']._read_group(
+                [('category_id', 'in', self.ids)], ['category_id'], ['__count'])
+        }
         for category in self:
-            category.task_count = self.env['task.manager'].search_count([
-                ('category_id', '=', category.id)
-            ])
+            category.task_count = counts.get(category.id, 0)
 
 
 class TaskTag(models.Model):
@@ -309,11 +393,14 @@ class TaskTag(models.Model):
     task_count = fields.Integer(string='Task Count', compute='_compute_task_count')
     
     def _compute_task_count(self):
-        """Compute number of tasks with this tag"""
+        """Compute number of tasks per tag with one grouped query"""
+        counts = {
+            tag.id: count
+            for tag, count in self.env['task.manager']._read_group(
+                [('tag_ids', 'in', self.ids)], ['tag_ids'], ['__count'])
+        }
         for tag in self:
-            tag.task_count = self.env['task.manager'].search_count([
-                ('tag_ids', 'in', tag.id)
-            ])
+            tag.task_count = counts.get(tag.id, 0)
 
 
 class TaskComment(models.Model):
@@ -342,27 +429,4 @@ class TaskComment(models.Model):
     @api.model
     def get_dashboard_data(self):
         """Get dashboard statistics"""
-        data = {}
-        
-        # Task statistics
-        all_tasks = self.search([])
-        data['total_tasks'] = len(all_tasks)
-        data['completed_tasks'] = len(all_tasks.filtered(lambda t: t.state == 'completed'))
-        data['in_progress_tasks'] = len(all_tasks.filtered(lambda t: t.state == 'in_progress'))
-        data['overdue_tasks'] = len(all_tasks.filtered(lambda t: t.is_overdue))
-        
-        # User statistics
-        telegram_users = self.env['telegram.user'].search([('is_active', '=', True)])
-        data['telegram_users'] = len(telegram_users)
-        
-        # Vehicle statistics
-        vehicles = self.env['task.vehicle'].search([('active', '=', True)])
-        data['vehicles'] = len(vehicles)
-        vehicle_alerts = vehicles.filtered(lambda v: v.insurance_alert or v.inspection_alert or v.service_alert)
-        data['vehicle_alerts'] = len(vehicle_alerts)
-        
-        # Telegram statistics
-        config = self.env['telegram.config'].search([('is_active', '=', True)], limit=1)
-        data['messages_today'] = config.messages_sent_today if config else 0
-        
-        return data
+        return self.env['task.dashboard'].get_dashboard_data()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+from .task_manager import OPEN_STATES
+
+_logger = logging.getLogger(__name__)
+
+# Comma-separated hours before date_deadline at which assignees are reminded
+PARAM_REMINDER_LEAD_HOURS = 'telegram_task_manager.reminder_lead_hours'
+DEFAULT_REMINDER_LEAD_HOURS = '24,2'
+
+
+class TaskDeadlineReminder(models.Model):
+    """One row per reminder sent, so each (task, lead time, deadline) is notified once"""
+    _name = 'task.deadline.reminder'
+    _description = 'Task Deadline Reminder'
+    _order = 'id desc'
+    _log_access = False
+
+    task_id = fields.Many2one('task.manager', string='Task', required=True, ondelete='cascade')
+    lead_hours = fields.Integer('Lead Time (hours)', required=True)
+    date_deadline = fields.Datetime('Deadline', required=True)
+    date_sent = fields.Datetime('Sent At', required=True, default=fields.Datetime.now)
+
+    _sql_constraints = [
+        ('task_lead_deadline_uniq', 'unique(task_id, lead_hours, date_deadline)',
+         'This reminder has already been sent!'),
+    ]
+
+    @api.model
+    def _get_lead_hours(self):
+        """Configured reminder lead times in hours, largest first"""
+        value = self.env['ir.config_parameter'].sudo().get_param(
+            PARAM_REMINDER_LEAD_HOURS, DEFAULT_REMINDER_LEAD_HOURS)
+        leads = set()
+        for part in value.split(','):
+            try:
+                lead = int(part.strip())
+            except ValueError:
+                _logger.warning("Ignoring invalid reminder lead time %r", part)
+                continue
+            if lead > 0:
+                leads.add(lead)
+        return sorted(leads, reverse=True)
+
+    @api.model
+    def _cron_send_reminders(self):
+        """Remind assignees of open tasks whose deadline is within a lead time
+
+        Due (task, lead) pairs are recorded with INSERT ... ON CONFLICT DO
+        NOTHING in the same transaction that queues the messages, so a
+        reminder is sent exactly once even if the cron is interrupted. When
+        several lead times are due at once (e.g. the task was created close
+        to its deadline) only the closest one is announced.
+        """
+        leads = self._get_lead_hours()
+        service = self.env['telegram.service']._get_notification_service()
+        if not leads or not service:
+            # Nothing is recorded, so due reminders go out once a service runs
+            return
+        now = fields.Datetime.now()
+        horizon = now + timedelta(hours=leads[0])
+
+        self.env['task.manager'].flush_model(['state', 'date_deadline', 'telegram_user_id'])
+        # The explicit horizon bound lets the range scan use the partial deadline index
+        self.env.cr.execute("""
+            INSERT INTO task_deadline_reminder (task_id, lead_hours, date_deadline, date_sent)
+            SELECT t.id, l.lead, t.date_deadline, %(now)s
+              FROM task_manager t
+              JOIN unnest(%(leads)s::int[]) AS l(lead)
+                ON t.date_deadline <= %(now)s + l.lead * interval '1 hour'
+             WHERE t.state IN %(states)s
+               AND t.telegram_user_id IS NOT NULL
+               AND t.date_deadline > %(now)s
+               AND t.date_deadline <= %(horizon)s
+            ON CONFLICT (task_id, lead_hours, date_deadline) DO NOTHING
+            RETURNING task_id, lead_hours
+        """, {'now': now, 'horizon': horizon, 'leads': leads, 'states': OPEN_STATES})
+        new_leads = {}
+        for task_id, lead in self.env.cr.fetchall():
+            new_leads.setdefault(task_id, set()).add(lead)
+        if not new_leads:
+            return
+
+        tasks = self.env['task.manager'].browse(list(new_leads))
+        due_tasks = tasks.filtered(
+            lambda t: min(lead for lead in leads if t.date_deadline <= now + timedelta(hours=lead)) in new_leads[t.id]
+        )
+        if not due_tasks:
+            return
+        service.send_deadline_reminders(due_tasks)
+        _logger.info("Queued deadline reminders for %s task(s)", len(due_tasks))
+
+    @api.autovacuum
+    def _gc_past_reminders(self):
+        """Reminders for deadlines that already passed can no longer be re-sent"""
+        self.search([('date_deadline', '<', fields.Datetime.now())]).unlink()
@@ -1,6 +1,24 @@
 # -*- coding: utf-8 -*-
+import base64
+import logging
+import os
+import tempfile
+
 from odoo import models, fields, api
 
+from .telegram_client import TelegramApiError
+
+_logger = logging.getLogger(__name__)
+
+# Photo downloads are retried this many times before the report is marked failed
+PHOTO_MAX_ATTEMPTS = 5
+# Reports whose photo is downloaded per fetcher batch (one commit per report)
+PHOTO_BATCH_SIZE = 20
+# Downloads up to this size stay in memory, larger ones spill to a temporary file
+PHOTO_SPOOL_SIZE = 1024 * 1024
+# Smallest side (px) of the Telegram photo size used as thumbnail
+THUMBNAIL_SIZE = 256
+
 class TaskReport(models.Model):
     _name = 'task.report'
     _description = 'Task Report'
@@ -20,9 +38,173 @@ class TaskReport(models.Model):
     photo_urls = fields.Text('Photo URLs')  # Store Telegram photo URLs
     admin_response = fields.Text('Admin Response')
     create_date = fields.Datetime('Created', default=fields.Datetime.now)
+
+    # Photo reports: the Telegram file ids are stored right away, the file
+    # itself is downloaded into an attachment by the "Fetch Report Photos" cron
+    photo_file_id = fields.Char('Telegram Photo', readonly=True)
+    telegram_service_id = fields.Many2one('telegram.service', string='Received By', readonly=True, ondelete='set null',
+                                          help='Bot that received the photo; file ids only work with that bot')
+    photo_file_unique_id = fields.Char('Telegram Photo Unique ID', readonly=True, index=True)
+    photo_thumb_file_id = fields.Char('Telegram Thumbnail', readonly=True)
+    photo_state = fields.Selection([
+        ('none', 'No Photo'),
+        ('pending', 'Downloading'),
+        ('done', 'Downloaded'),
+        ('failed', 'Failed'),
+    ], string='Photo Status', default='none', required=True, readonly=True, index=True)
+    photo_attempts = fields.Integer('Photo Download Attempts', readonly=True)
+    photo_error = fields.Char('Photo Download Error', readonly=True)
+    photo_attachment_id = fields.Many2one('ir.attachment', string='Photo', readonly=True, ondelete='set null')
+    photo_thumbnail = fields.Image('Thumbnail', max_width=THUMBNAIL_SIZE, max_height=THUMBNAIL_SIZE, readonly=True)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        reports = super().create(vals_list)
+        if any(report.photo_state == 'pending' for report in reports):
+            self._trigger_photo_fetch()
+        return reports
     
     def action_resolve(self):
         self.state = 'resolved'
         
     def action_close(self):
         self.state = 'closed'
+
+    def action_retry_photo(self):
+        """Download failed photos again"""
+        self.filtered(lambda r: r.photo_file_id).write({'photo_state': 'pending', 'photo_attempts': 0, 'photo_error': False})
+        self._trigger_photo_fetch()
+
+    @api.model
+    def _trigger_photo_fetch(self):
+        cron = self.env.ref(f'{self._module}.ir_cron_task_report_fetch_photos', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    @api.model
+    def _cron_fetch_photos(self):
+        """Download pending report photos, committing after each report
+
+        Each photo is downloaded through the service that received it, as
+        Telegram file ids are only valid for that bot. A photo whose
+        download failed is retried on the next run.
+        """
+        fallback = None
+        tried = [0]
+        while True:
+            self.env.cr.execute("""
+                SELECT id FROM task_report
+                 WHERE photo_state = 'pending'
+                   AND NOT id = ANY(%s)
+                 ORDER BY id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+            """, (tried, PHOTO_BATCH_SIZE))
+            ids = [row[0] for row in self.env.cr.fetchall()]
+            if not ids:
+                break
+            tried += ids
+            for report in self.browse(ids):
+                service = report.telegram_service_id
+                if not service:
+                    # Reports from before the receiving service was recorded
+                    if fallback is None:
+                        fallback = self.env['telegram.service']._get_notification_service()
+                    service = fallback
+                if service:
+                    report._fetch_photo(service)
+                else:
+                    report.write({'photo_state': 'failed', 'photo_error': 'No Telegram service to download the photo with'})
+                self.env.cr.commit()
+
+    def _fetch_photo(self, service):
+        """Store the report photo as an attachment, with a thumbnail"""
+        self.ensure_one()
+        # The same photo sent (or forwarded) again: reuse the downloaded file
+        same_photo = self.photo_file_unique_id and self.search([
+            ('photo_file_unique_id', '=', self.photo_file_unique_id),
+            ('photo_state', '=', 'done'),
+            ('photo_attachment_id', '!=', False),
+            ('id', '!=', self.id),
+        ], limit=1)
+        if same_photo:
+            self.write({
+                'photo_state': 'done',
+                'photo_attachment_id': same_photo.photo_attachment_id.sudo().copy({'res_id': self.id}).id,
+                'photo_thumbnail': same_photo.photo_thumbnail,
+                'photo_error': False,
+            })
+            return
+
+        client = service._get_client()
+        try:
+            # The small thumbnail first, so a failed download never leaves
+            # the full-size attachment behind; the savepoint covers the rest
+            with self.env.cr.savepoint():
+                thumbnail = False
+                if self.photo_thumb_file_id:
+                    with tempfile.SpooledTemporaryFile(PHOTO_SPOOL_SIZE) as thumb_file:
+                        client.download(client.call('getFile', {'file_id': self.photo_thumb_file_id})['file_path'], thumb_file)
+                        thumb_file.seek(0)
+                        thumbnail = base64.b64encode(thumb_file.read())
+                attachment = self._download_attachment(client, self.photo_file_id)
+        except TelegramApiError as e:
+            attempts = self.photo_attempts + 1
+            failed = not e.is_transient or attempts >= PHOTO_MAX_ATTEMPTS
+            _logger.warning("Photo download for report %s failed (attempt %s): %s", self.id, attempts, e.description)
+            self.write({
+                'photo_state': 'failed' if failed else 'pending',
+                'photo_attempts': attempts,
+                'photo_error': e.description,
+            })
+            return
+
+        self.write({
+            'photo_state': 'done',
+            'photo_attachment_id': attachment.id,
+            'photo_thumbnail': thumbnail or False,
+            'photo_error': False,
+        })
+
+    def _download_attachment(self, client, file_id):
+        """Stream a Telegram file into an ir.attachment of this report
+
+        With filestore storage the download goes straight to the
+        content-addressed file (skipped when identical content is already
+        stored), so memory use does not depend on the file size. Like
+        ir.attachment's own writes, a new file is marked for garbage
+        collection, which keeps it only if an attachment references it.
+        """
+        file_path = client.call('getFile', {'file_id': file_id})['file_path']
+        Attachment = self.env['ir.attachment'].sudo()
+        vals = {
+            'name': f"photo_{self.id}{os.path.splitext(file_path)[1] or '.jpg'}",
+            'res_model': self._name,
+            'res_id': self.id,
+            'type': 'binary',
+            'mimetype': 'image/jpeg',
+        }
+        with tempfile.SpooledTemporaryFile(PHOTO_SPOOL_SIZE) as tmp:
+            size, checksum = client.download(file_path, tmp)
+            tmp.seek(0)
+            if Attachment._storage() != 'file':
+                return Attachment.create(dict(vals, raw=tmp.read()))
+            # Same layout as ir.attachment._get_path, which would compare the
+            # (not loaded) content with an existing file of the same checksum
+            fname = f'{checksum[:2]}/{checksum}'
+            full_path = Attachment._full_path(fname)
+            if not os.path.exists(full_path):
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                partial_path = f'{full_path}.{os.getpid()}.part'
+                try:
+                    with open(partial_path, 'wb') as target:
+                        while chunk := tmp.read(PHOTO_SPOOL_SIZE):
+                            target.write(chunk)
+                    os.replace(partial_path, full_path)
+                except OSError:
+                    if os.path.exists(partial_path):
+                        os.unlink(partial_path)
+                    raise
+                # As _file_write does: the file is collected if the transaction aborts
+                Attachment._mark_for_gc(fname)
+        return Attachment.create(dict(vals, store_fname=fname, file_size=size, checksum=checksum))
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import models, fields, api
+
+from . import telegram_templates as tpl
+
+_logger = logging.getLogger(__name__)
+
+# Events listed one by one in a digest, the rest are only counted
+DIGEST_MAX_EVENTS = 30
+# Longer summaries are cut, so a full digest stays below Telegram's 4096 characters
+SUMMARY_MAX_LENGTH = 100
+
+EVENT_TYPES = [
+    ('report', 'Reports'),
+    ('photo_report', 'Photo Reports'),
+    ('task_done', 'Completed Tasks'),
+    ('task_assigned', 'Assigned Tasks'),
+    ('new_user', 'New Users'),
+]
+EVENT_ICONS = {
+    'report': '⚠️',
+    'photo_report': '📸',
+    'task_done': '✅',
+    'task_assigned': '📋',
+    'new_user': '👤',
+}
+
+
+class TelegramAdminEvent(models.Model):
+    """Admin notifications waiting for the next digest message"""
+    _name = 'telegram.admin.event'
+    _description = 'Telegram Admin Digest Event'
+    _order = 'id'
+    _rec_name = 'summary'
+
+    service_id = fields.Many2one('telegram.service', string='Service', required=True, ondelete='cascade', index=True)
+    event_type = fields.Selection(EVENT_TYPES, string='Event', required=True)
+    summary = fields.Char('Summary', required=True)
+
+    @api.model
+    def _add(self, service, event_type, summary):
+        """Collect an event and make sure the digest goes out when it is due"""
+        first = not self.search_count([('service_id', '=', service.id)], limit=1)
+        if len(summary) > SUMMARY_MAX_LENGTH:
+            summary = summary[:SUMMARY_MAX_LENGTH - 1] + '…'
+        event = self.create({'service_id': service.id, 'event_type': event_type, 'summary': summary})
+        if first:
+            # Later events are picked up by the run already scheduled for this one
+            self._trigger_digest(service._get_next_digest_date())
+        return event
+
+    @api.model
+    def _trigger_digest(self, at=None):
+        cron = self.env.ref(f'{self._module}.ir_cron_telegram_admin_digest', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger(at)
+
+    @api.model
+    def _cron_send_digests(self):
+        """Send one digest per service whose interval has elapsed"""
+        now = fields.Datetime.now()
+        for service, in self._read_group([], ['service_id']):
+            due_date = service._get_next_digest_date()
+            if service.admin_digest_mode and due_date > now:
+                self._trigger_digest(due_date)
+                continue
+            events = self.search([('service_id', '=', service.id)])
+            if service.admin_telegram_id:
+                service._send_message(service.admin_telegram_id, self._render_digest(events, service.admin_digest_last))
+            _logger.info("Sent admin digest with %s event(s)", len(events))
+            events.unlink()
+            service.admin_digest_last = now
+
+    @api.model
+    def _render_digest(self, events, since):
+        """One message: counts per event type, then the oldest events one per line"""
+        labels = dict(EVENT_TYPES)
+        counts = {}
+        for event in events:
+            counts[event.event_type] = counts.get(event.event_type, 0) + 1
+        text = tpl.render('admin_digest_header', count=len(events), since=since or events[0].create_date)
+        for event_type, count in counts.items():
+            text += tpl.render('admin_digest_count', icon=EVENT_ICONS[event_type],
+                               label=labels[event_type], count=count)
+        text += "\n"
+        for event in events[:DIGEST_MAX_EVENTS]:
+            text += tpl.render('admin_digest_item', icon=EVENT_ICONS[event.event_type],
+                               time=event.create_date, summary=event.summary)
+        if len(events) > DIGEST_MAX_EVENTS:
+            text += f"\n… and {len(events) - DIGEST_MAX_EVENTS} more"
+        return text
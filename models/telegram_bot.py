@@ -1,12 +1,22 @@
 # -*- coding: utf-8 -*-
 import logging
-import requests
 import json
 import threading
-from odoo import models, fields, api, registry, SUPERUSER_ID
+import time
+from odoo import models, fields, api, SUPERUSER_ID
+
+from .telegram_client import TelegramApiError, get_client
 
 _logger = logging.getLogger(__name__)
 
+# getUpdates long-poll timeout and batch size
+POLL_TIMEOUT = 50
+POLL_LIMIT = 100
+# A poller cron run ends within this many seconds (keep below
+# limit_time_real_cron); the next run takes over right away
+PARAM_POLL_RUN_SECONDS = 'telegram_task_manager.poll_run_seconds'
+DEFAULT_POLL_RUN_SECONDS = 110
+
 class TelegramBot(models.Model):
     _name = 'telegram.bot'
     _description = 'Telegram Bot Service'
@@ -35,62 +45,165 @@ class TelegramBot(models.Model):
         """Stop the Telegram bot"""
         if self.webhook_url:
             self._remove_webhook()
+        else:
+            self._get_service().is_running = False
         self.is_running = False
         _logger.info("Telegram bot stopped")
 
+    def _get_client(self):
+        """Pooled keep-alive HTTP client for the configured bot token"""
+        return get_client(self.env, self.config_id.bot_token)
+
     def _set_webhook(self):
         """Set webhook for bot"""
-        url = f"https://api.telegram.org/bot{self.config_id.bot_token}/setWebhook"
         data = {'url': self.webhook_url}
-        response = requests.post(url, json=data)
-        if response.ok:
+        try:
+            self._get_client().call('setWebhook', data)
             _logger.info("Webhook set successfully")
-        else:
-            _logger.error("Failed to set webhook: %s", response.text)
+        except TelegramApiError as e:
+            _logger.error("Failed to set webhook: %s", e.description)
 
     def _remove_webhook(self):
         """Remove webhook"""
-        url = f"https://api.telegram.org/bot{self.config_id.bot_token}/deleteWebhook"
-        requests.post(url)
+        try:
+            self._get_client().call('deleteWebhook')
+        except TelegramApiError as e:
+            _logger.error("Failed to remove webhook: %s", e.description)
 
     def _start_polling(self):
-        """Start polling for updates (background thread)"""
-        def poll():
-            offset = 0
-            while self.is_running:
+        """Switch the bot to long polling
+
+        Polling runs in the "Telegram: Poll Updates" cron, so it survives
+        worker restarts and only one poller per token runs in the cluster.
+        """
+        self._remove_webhook()
+        self._get_service().is_running = True
+        cron = self.env.ref(f'{self._module}.ir_cron_telegram_poll_updates', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    def _get_service(self):
+        """telegram.service processing this bot's updates (created on first use)"""
+        service = self.env['telegram.service'].search([
+            ('bot_token', '=', self.config_id.bot_token)
+        ], limit=1)
+        if not service:
+            service = self.env['telegram.service'].create({
+                'name': f'Service for {self.config_id.name}',
+                'bot_token': self.config_id.bot_token,
+                'admin_telegram_id': self.config_id.admin_telegram_id
+            })
+        return service
+
+    @api.model
+    def _cron_poll_updates(self):
+        """Long-poll every running bot that has no webhook, each bot in its own thread
+
+        Polled one after the other, each bot would wait a whole run of the
+        others' long polls; in parallel every bot gets the full run budget.
+        """
+        bots = self.search([('is_running', '=', True), ('webhook_url', '=', False)])
+        if not bots:
+            return
+        run_seconds = int(self.env['ir.config_parameter'].sudo().get_param(
+            PARAM_POLL_RUN_SECONDS, DEFAULT_POLL_RUN_SECONDS))
+        jobs = [(bot.id, bot.config_id.bot_token, bot._get_service().id) for bot in bots]
+        # Persist the services created above before the poll cursors look them up
+        self.env.cr.commit()
+
+        registry = self.env.registry
+        threads = [
+            threading.Thread(target=self._poll, args=(registry, bot_id, token, service_id, run_seconds),
+                             name=f'telegram-poll-{bot_id}', daemon=True)
+            for bot_id, token, service_id in jobs
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Hand over to the next run immediately to keep polling continuous
+        if self.search_count([('is_running', '=', True), ('webhook_url', '=', False)]):
+            cron = self.env.ref(f'{self._module}.ir_cron_telegram_poll_updates', raise_if_not_found=False)
+            if cron:
+                cron.sudo()._trigger()
+
+    @api.model
+    def _poll(self, registry, bot_id, token, service_id, run_seconds):
+        """Long-poll getUpdates for one bot until the run budget is spent
+
+        Runs in a thread of its own and only uses its own cursors.
+        Leadership is a session-level advisory lock on the bot token taken on
+        a dedicated connection, so a single poller per token runs across all
+        Odoo servers sharing the database; it is released when the run ends
+        or the connection dies. Each batch is processed and its offset saved
+        in a fresh cursor.
+        """
+        lock_key = f'telegram.poll:{token}'
+        try:
+            with registry.cursor() as lock_cr:
+                lock_cr.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (lock_key,))
+                if not lock_cr.fetchone()[0]:
+                    _logger.info("Another worker is already polling bot %s", bot_id)
+                    return
+                # The session lock outlives the transaction; don't sit idle in one
+                lock_cr.commit()
                 try:
-                    updates = self._get_updates(offset)
-                    for update in updates:
-                        self._process_update(update)
-                        offset = update['update_id'] + 1
+                    deadline = time.monotonic() + run_seconds
+                    while time.monotonic() + POLL_TIMEOUT + 10 <= deadline:
+                        if not self._poll_batch(registry, bot_id, service_id):
+                            break
+                finally:
+                    lock_cr.execute("SELECT pg_advisory_unlock(hashtext(%s))", (lock_key,))
+        except Exception:
+            _logger.exception("Polling bot %s failed", bot_id)
+
+    @api.model
+    def _poll_batch(self, registry, bot_id, service_id):
+        """Fetch and process one getUpdates batch; return False to stop polling"""
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            bot = env['telegram.bot'].browse(bot_id)
+            service = env['telegram.service'].browse(service_id)
+            if not bot.exists() or not bot.is_running or not service.exists():
+                return False
+            offset = service.last_update_id + 1 if service.last_update_id else 0
+            try:
+                updates = bot._get_updates(offset)
+            except TelegramApiError as e:
+                _logger.error("Polling error: %s", e.description)
+                if e.error_code == 409:
+                    # A webhook is set or another client polls this token
+                    return False
+                time.sleep(5)
+                return True
+
+            for update in updates:
+                try:
+                    with cr.savepoint():
+                        if service.fast_ack:
+                            env['telegram.update']._store(service, update)
+                        else:
+                            service._process_update_once(update)
                 except Exception as e:
-                    _logger.error("Polling error: %s", e)
-                    break
-                    
-        thread = threading.Thread(target=poll)
-        thread.daemon = True
-        thread.start()
+                    # Don't get stuck on the faulty update, but keep it for a retry:
+                    # the offset moves past it and Telegram won't send it again
+                    _logger.error("❌ Error processing polled update %s: %s", update.get('update_id'), e)
+                    if 'update_id' in update:
+                        env['telegram.update']._store_failed(service, update, str(e))
+            if updates:
+                service.last_update_id = updates[-1]['update_id']
+        return True
 
     def _get_updates(self, offset=0):
-        """Get updates from Telegram"""
-        url = f"https://api.telegram.org/bot{self.config_id.bot_token}/getUpdates"
-        params = {'offset': offset, 'timeout': 30}
-        response = requests.get(url, params=params)
-        if response.ok:
-            return response.json().get('result', [])
-        return []
-
-    def _process_update(self, update):
-        """Process single update"""
-        # Use webhook controller logic
-        from ..controllers.telegram_webhook import TelegramWebhook
-        webhook = TelegramWebhook()
-        
-        # Simulate webhook data
-        if 'message' in update:
-            webhook._handle_message(update['message'])
-        elif 'callback_query' in update:
-            webhook._handle_callback_query(update['callback_query'])
+        """Long-poll Telegram for updates"""
+        data = {
+            'offset': offset,
+            'timeout': POLL_TIMEOUT,
+            'limit': POLL_LIMIT,
+            'allowed_updates': ['message', 'callback_query'],
+        }
+        return self._get_client().call('getUpdates', data, timeout=POLL_TIMEOUT + 10) or []
 
     def send_task_notification(self, task_id):
         """Send task notification to user"""
@@ -119,7 +232,6 @@ class TelegramBot(models.Model):
 
     def _send_message(self, chat_id, text, reply_markup=None):
         """Send message via Telegram API"""
-        url = f"https://api.telegram.org/bot{self.config_id.bot_token}/sendMessage"
         data = {
             'chat_id': chat_id,
             'text': text,
@@ -129,8 +241,8 @@ class TelegramBot(models.Model):
             data['reply_markup'] = json.dumps(reply_markup)
             
         try:
-            response = requests.post(url, json=data)
-            return response.ok
+            self._get_client().call('sendMessage', data)
+            return True
         except Exception as e:
             _logger.error("Error sending message: %s", e)
             return False
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools.safe_eval import safe_eval
+
+from . import telegram_templates as tpl
+
+_logger = logging.getLogger(__name__)
+
+# Recipients loaded and queued per batch (one commit per batch)
+BROADCAST_BATCH_SIZE = 500
+# A broadcast cron run hands over to a fresh run after this many seconds
+BROADCAST_RUN_SECONDS = 60
+
+BROADCAST_TYPES = [
+    ('info', 'Information'),
+    ('warning', 'Warning'),
+    ('urgent', 'Urgent'),
+]
+BROADCAST_ICONS = {'info': '📢', 'warning': '⚠️', 'urgent': '🚨'}
+
+
+class TelegramBroadcast(models.Model):
+    """One message sent to every Telegram user matching a domain
+
+    Recipients are read in id order in batches and queued as bulk
+    messages; the last queued user id is saved with each batch, so a
+    broadcast interrupted by a restart resumes where it stopped.
+    """
+    _name = 'telegram.broadcast'
+    _description = 'Telegram Broadcast'
+    _order = 'id desc'
+
+    name = fields.Char('Title', required=True)
+    message = fields.Text('Message', required=True)
+    broadcast_type = fields.Selection(BROADCAST_TYPES, string='Type', default='info', required=True)
+    user_domain = fields.Char('Recipients', default="[('active', '=', True)]", required=True,
+                              help='Domain on Telegram users')
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('running', 'Sending'),
+        ('done', 'Done'),
+        ('cancelled', 'Cancelled'),
+    ], string='Status', default='draft', required=True, readonly=True, index=True)
+    last_user_id = fields.Integer('Last Queued User', readonly=True)
+    date_start = fields.Datetime('Started', readonly=True)
+    date_done = fields.Datetime('Finished', readonly=True)
+    recipient_ids = fields.One2many('telegram.broadcast.recipient', 'broadcast_id', string='Recipients', readonly=True)
+    recipient_count = fields.Integer('Queued', compute='_compute_delivery_counts')
+    sent_count = fields.Integer('Sent', compute='_compute_delivery_counts')
+    failed_count = fields.Integer('Failed', compute='_compute_delivery_counts')
+    pending_count = fields.Integer('Pending', compute='_compute_delivery_counts')
+
+    def _compute_delivery_counts(self):
+        """Count recipients per delivery state with one grouped query"""
+        counts = {}
+        if self.ids:
+            self.env['telegram.broadcast.recipient'].flush_model()
+            self.env['telegram.message.queue'].flush_model(['state'])
+            # Delivered messages are vacuumed from the queue after a week
+            self.env.cr.execute("""
+                SELECT r.broadcast_id, COALESCE(q.state, 'sent'), COUNT(*)
+                  FROM telegram_broadcast_recipient r
+             LEFT JOIN telegram_message_queue q ON q.id = r.message_id
+                 WHERE r.broadcast_id IN %s
+              GROUP BY r.broadcast_id, COALESCE(q.state, 'sent')
+            """, (tuple(self.ids),))
+            for broadcast_id, state, count in self.env.cr.fetchall():
+                counts.setdefault(broadcast_id, {})[state] = count
+        for broadcast in self:
+            by_state = counts.get(broadcast.id, {})
+            broadcast.recipient_count = sum(by_state.values())
+            broadcast.sent_count = by_state.get('sent', 0)
+            broadcast.failed_count = by_state.get('failed', 0)
+            broadcast.pending_count = by_state.get('pending', 0)
+
+    def action_start(self):
+        """Start sending in the background"""
+        if any(broadcast.state != 'draft' for broadcast in self):
+            raise UserError(_('Only draft broadcasts can be started.'))
+        for broadcast in self:
+            broadcast._get_user_domain()  # fail now on a malformed domain
+        self.write({'state': 'running', 'date_start': fields.Datetime.now()})
+        self._trigger_broadcast()
+
+    def action_cancel(self):
+        """Stop queuing recipients and drop the messages not sent yet"""
+        self.filtered(lambda b: b.state in ('draft', 'running')).write({
+            'state': 'cancelled',
+            'date_done': fields.Datetime.now(),
+        })
+        pending = self.recipient_ids.message_id.filtered(lambda m: m.state == 'pending')
+        pending.write({'state': 'failed', 'last_error': 'Broadcast cancelled'})
+
+    def _get_user_domain(self):
+        self.ensure_one()
+        try:
+            return safe_eval(self.user_domain or '[]')
+        except Exception as e:
+            raise UserError(_('Invalid recipient domain: %s', e))
+
+    @api.model
+    def _trigger_broadcast(self):
+        cron = self.env.ref(f'{self._module}.ir_cron_telegram_broadcast', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    @api.model
+    def _cron_run_broadcasts(self):
+        """Queue the recipients of running broadcasts, batch by batch"""
+        deadline = time.monotonic() + BROADCAST_RUN_SECONDS
+        for broadcast in self.search([('state', '=', 'running')], order='id'):
+            while broadcast._queue_next_batch():
+                self.env.cr.commit()
+                if time.monotonic() > deadline:
+                    # Free the cron worker; the next run resumes from last_user_id
+                    self._trigger_broadcast()
+                    return
+            self.env.cr.commit()
+
+    def _queue_next_batch(self):
+        """Queue messages for the next users after last_user_id; return True if more may follow"""
+        self.ensure_one()
+        service = self.env['telegram.service']._get_notification_service()
+        if not service:
+            _logger.warning("Broadcast %s waiting: no running Telegram service", self.id)
+            return False
+        users = self.env['telegram.user'].search(
+            self._get_user_domain() + [('id', '>', self.last_user_id), ('telegram_id', '!=', False)],
+            order='id', limit=BROADCAST_BATCH_SIZE)
+        if not users:
+            self.write({'state': 'done', 'date_done': fields.Datetime.now()})
+            _logger.info("Broadcast %s fully queued", self.id)
+            return False
+
+        text = tpl.render('broadcast', icon=BROADCAST_ICONS[self.broadcast_type], title=self.name, message=self.message)
+        messages = self.env['telegram.message.queue']._enqueue_many(service, 'sendMessage', [
+            {'chat_id': user.telegram_id, 'text': text, 'parse_mode': 'Markdown'}
+            for user in users
+        ], bulk=True)
+        self.env['telegram.broadcast.recipient'].create([
+            {'broadcast_id': self.id, 'telegram_user_id': user.id, 'message_id': message.id}
+            for user, message in zip(users, messages)
+        ])
+        self.last_user_id = users[-1].id
+        return len(users) == BROADCAST_BATCH_SIZE
+
+
+class TelegramBroadcastRecipient(models.Model):
+    """Delivery of a broadcast to one Telegram user"""
+    _name = 'telegram.broadcast.recipient'
+    _description = 'Telegram Broadcast Recipient'
+    _order = 'id'
+    _log_access = False
+
+    broadcast_id = fields.Many2one('telegram.broadcast', string='Broadcast', required=True, ondelete='cascade', index=True)
+    telegram_user_id = fields.Many2one('telegram.user', string='User', required=True, ondelete='cascade')
+    message_id = fields.Many2one('telegram.message.queue', string='Message', ondelete='set null')
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ], string='Delivery', compute='_compute_state')
+    last_error = fields.Text(related='message_id.last_error')
+
+    _sql_constraints = [
+        ('broadcast_user_uniq', 'unique(broadcast_id, telegram_user_id)', 'A user receives a broadcast only once.'),
+    ]
+
+    @api.depends('message_id.state')
+    def _compute_state(self):
+        for recipient in self:
+            # No message left means it was delivered and vacuumed from the queue
+            recipient.state = recipient.message_id.state or 'sent'
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+import logging
+import re
+from datetime import date, datetime, timedelta
+
+import psycopg2
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# A pending prompt is forgotten when it has not been answered within this time
+CONVERSATION_TTL = timedelta(hours=1)
+
+# Day names understood in replies (English and Latvian), Monday = 0
+WEEKDAYS = {
+    'monday': 0, 'mon': 0, 'pirmdiena': 0,
+    'tuesday': 1, 'tue': 1, 'otrdiena': 1,
+    'wednesday': 2, 'wed': 2, 'trešdiena': 2,
+    'thursday': 3, 'thu': 3, 'ceturtdiena': 3,
+    'friday': 4, 'fri': 4, 'piektdiena': 4,
+    'saturday': 5, 'sat': 5, 'sestdiena': 5,
+    'sunday': 6, 'sun': 6, 'svētdiena': 6,
+}
+RELATIVE_DAYS = {'today': 0, 'šodien': 0, 'tomorrow': 1, 'rīt': 1}
+_NUMERIC_DAY = re.compile(r'^(\d{1,2})[./](\d{1,2})(?:[./](\d{2}|\d{4}))?\.?$')
+
+
+def parse_day(text, today):
+    """Read a reply such as "2025-08-15", "15.08.2025", "15.08", "Friday" or "tomorrow"
+
+    Returns a date no earlier than ``today``, or None. Day names and
+    dates without a year mean the next such day.
+    """
+    text = text.strip().lower()
+    if text in RELATIVE_DAYS:
+        return today + timedelta(days=RELATIVE_DAYS[text])
+    if text in WEEKDAYS:
+        return today + timedelta(days=(WEEKDAYS[text] - today.weekday()) % 7)
+    try:
+        day = datetime.strptime(text, '%Y-%m-%d').date()
+    except ValueError:
+        match = _NUMERIC_DAY.match(text)
+        if not match:
+            return None
+        day_number, month, year = match.groups()
+        try:
+            if year:
+                day = date(int(year) + (2000 if len(year) == 2 else 0), int(month), int(day_number))
+            else:
+                day = date(today.year, int(month), int(day_number))
+                if day < today:
+                    day = day.replace(year=today.year + 1)
+        except ValueError:
+            return None
+    return day if day >= today else None
+
+
+class TelegramChat(models.Model):
+    """Newest bot message per Telegram chat, one compact row per chat
+
+    Written by the outbox dispatcher only, in a transaction of its own,
+    so it never conflicts with the processing of incoming updates.
+    """
+    _name = 'telegram.chat'
+    _description = 'Telegram Chat'
+    _rec_name = 'chat_id'
+    _log_access = False
+
+    chat_id = fields.Char('Chat ID', required=True, readonly=True)
+    last_message_id = fields.Integer('Last Bot Message', readonly=True,
+                                     help='Newest message the bot sent to this chat')
+
+    _sql_constraints = [
+        ('chat_id_uniq', 'unique(chat_id)', 'One row per Telegram chat.'),
+    ]
+
+    @api.model
+    def _remember_messages(self, messages):
+        """Record the newest bot message per chat from (chat_id, message_id) pairs
+
+        Best effort: the upsert runs in a separate short transaction, so a
+        conflict with a concurrent dispatcher never rolls back (and
+        re-sends) the batch that was just delivered.
+        """
+        latest = {}
+        for chat_id, message_id in messages:
+            latest[str(chat_id)] = max(message_id, latest.get(str(chat_id), 0))
+        if not latest:
+            return
+        chat_ids = sorted(latest)  # same lock order in concurrent dispatchers
+        try:
+            with self.env.registry.cursor() as cr:
+                cr.execute("""
+                    INSERT INTO telegram_chat (chat_id, last_message_id)
+                    SELECT * FROM unnest(%s::varchar[], %s::int[])
+                    ON CONFLICT (chat_id) DO UPDATE
+                       SET last_message_id = GREATEST(telegram_chat.last_message_id, EXCLUDED.last_message_id)
+                """, (chat_ids, [latest[chat_id] for chat_id in chat_ids]))
+        except psycopg2.Error as e:
+            # Only decides between editing and sending anew; the next send corrects it
+            _logger.debug("Telegram last message ids not recorded: %s", e)
+        self.invalidate_model(['last_message_id'])
+
+    @api.model
+    def _get_last_message_id(self, chat_id):
+        """Newest message the bot sent to the chat, or None if unknown"""
+        self.env.cr.execute("SELECT last_message_id FROM telegram_chat WHERE chat_id = %s", (str(chat_id),))
+        row = self.env.cr.fetchone()
+        return row[0] if row else None
+
+
+class TelegramConversation(models.Model):
+    """Prompt a Telegram chat is expected to answer, one compact row per chat
+
+    Records e.g. that the execution day of task N was asked; the next
+    free-text message in the chat is routed to that prompt's handler.
+    Kept apart from telegram.chat, which the dispatcher writes
+    concurrently.
+    """
+    _name = 'telegram.conversation'
+    _description = 'Telegram Conversation State'
+    _rec_name = 'chat_id'
+    _log_access = False
+
+    chat_id = fields.Char('Chat ID', required=True, readonly=True)
+    state = fields.Char('Awaiting', required=True, readonly=True, help='Prompt waiting for an answer')
+    res_id = fields.Integer('Awaiting Record', readonly=True)
+    date_expires = fields.Datetime('Awaiting Until', required=True, readonly=True, index=True)
+
+    _sql_constraints = [
+        ('chat_id_uniq', 'unique(chat_id)', 'One pending prompt per Telegram chat.'),
+    ]
+
+    @api.model
+    def _set_state(self, chat_id, state, res_id=0):
+        """Wait for an answer to ``state`` in this chat, replacing any earlier prompt"""
+        self.env.cr.execute("""
+            INSERT INTO telegram_conversation (chat_id, state, res_id, date_expires)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (chat_id) DO UPDATE
+               SET state = EXCLUDED.state,
+                   res_id = EXCLUDED.res_id,
+                   date_expires = EXCLUDED.date_expires
+        """, (str(chat_id), state, res_id, fields.Datetime.now() + CONVERSATION_TTL))
+        self.invalidate_model()
+
+    @api.model
+    def _get_state(self, chat_id):
+        """(state, res_id) of the unexpired prompt waiting in this chat, or (None, None)"""
+        self.env.cr.execute("""
+            SELECT state, res_id FROM telegram_conversation
+             WHERE chat_id = %s AND date_expires > %s
+        """, (str(chat_id), fields.Datetime.now()))
+        return self.env.cr.fetchone() or (None, None)
+
+    @api.model
+    def _clear_state(self, chat_id):
+        """Forget the prompt waiting in this chat, if any"""
+        self.env.cr.execute("DELETE FROM telegram_conversation WHERE chat_id = %s", (str(chat_id),))
+        self.invalidate_model()
+
+    @api.autovacuum
+    def _gc_expired_states(self):
+        """Drop all expired prompts in one statement (they are already ignored by _get_state)"""
+        self.env.cr.execute("DELETE FROM telegram_conversation WHERE date_expires < %s", (fields.Datetime.now(),))
+        self.invalidate_model()
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_logger = logging.getLogger(__name__)
+
+API_URL = 'https://api.telegram.org'
+
+# ir.config_parameter keys and their defaults
+PARAM_POOL_SIZE = 'telegram_task_manager.http_pool_size'
+PARAM_MAX_RETRIES = 'telegram_task_manager.http_max_retries'
+PARAM_MAX_RETRY_WAIT = 'telegram_task_manager.http_max_retry_wait'
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_MAX_RETRY_WAIT = 5
+PARAM_SEND_CONCURRENCY = 'telegram_task_manager.send_concurrency'
+DEFAULT_SEND_CONCURRENCY = 4
+# Bytes read per chunk when streaming a file download
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class TelegramApiError(Exception):
+    """Error returned by the Bot API (or raised while reaching it)"""
+
+    def __init__(self, description, error_code=None, retry_after=None):
+        super().__init__(description)
+        self.description = description
+        self.error_code = error_code
+        self.retry_after = retry_after
+
+    @property
+    def is_transient(self):
+        """Network errors, flood control and server errors are worth retrying later"""
+        return self.error_code is None or self.error_code == 429 or self.error_code >= 500
+
+
+class TelegramClient:
+    """Keep-alive HTTP client for one bot token
+
+    Connections to api.telegram.org are pooled in a requests.Session and
+    reused by every call made with the same token in this process.
+    """
+
+    def __init__(self, token, pool_size=DEFAULT_POOL_SIZE, max_retries=DEFAULT_MAX_RETRIES,
+                 max_retry_wait=DEFAULT_MAX_RETRY_WAIT):
+        self.token = token
+        self.max_retries = max_retries
+        self.max_retry_wait = max_retry_wait
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+
+    def call(self, method, data=None, params=None, timeout=10):
+        """Call a Bot API method and return its ``result``
+
+        429 and 5xx responses are retried with exponential backoff, waiting
+        for Telegram's ``retry_after`` when it is short enough; otherwise a
+        TelegramApiError is raised so the caller can reschedule.
+        """
+        url = f"{API_URL}/bot{self.token}/{method}"
+        attempt = 0
+        while True:
+            try:
+                response = self.session.post(url, json=data, params=params, timeout=timeout)
+                result, error = self._parse_response(response)
+                if error is None:
+                    return result
+            except requests.exceptions.RequestException as e:
+                error = TelegramApiError(self._sanitize(str(e)))
+
+            if not error.is_transient or attempt >= self.max_retries:
+                raise error
+            wait = error.retry_after if error.retry_after is not None else 0.5 * 2 ** attempt
+            if wait > self.max_retry_wait:
+                raise error
+            attempt += 1
+            _logger.warning("Telegram %s failed (%s), retry %s/%s in %ss",
+                            method, error.description, attempt, self.max_retries, wait)
+            time.sleep(wait)
+
+    def get_file_url(self, file_path):
+        """Download URL of a file returned by getFile"""
+        return f"{API_URL}/file/bot{self.token}/{file_path}"
+
+    def download(self, file_path, fileobj, timeout=30):
+        """Stream a file returned by getFile into ``fileobj``
+
+        The content is never held in memory as a whole. Returns the size
+        and the SHA-1 hex digest (the checksum ir.attachment uses).
+        """
+        digest = hashlib.sha1()
+        size = 0
+        try:
+            with self.session.get(self.get_file_url(file_path), stream=True, timeout=timeout) as response:
+                if not response.ok:
+                    raise TelegramApiError(f'HTTP {response.status_code}', response.status_code)
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    fileobj.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+        except requests.exceptions.RequestException as e:
+            raise TelegramApiError(self._sanitize(str(e)))
+        return size, digest.hexdigest()
+
+    def _parse_response(self, response):
+        """Return ``(result, None)`` on success and ``(None, TelegramApiError)`` otherwise"""
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        if response.ok and body.get('ok'):
+            return body.get('result'), None
+        retry_after = (body.get('parameters') or {}).get('retry_after')
+        if retry_after is None and response.headers.get('Retry-After', '').isdigit():
+            retry_after = int(response.headers['Retry-After'])
+        description = body.get('description') or self._sanitize(response.text) or f'HTTP {response.status_code}'
+        return None, TelegramApiError(description, body.get('error_code', response.status_code), retry_after)
+
+    def _sanitize(self, text):
+        """Never let the bot token leak into logs or error fields"""
+        return text.replace(self.token, '***') if self.token else text
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(env, token):
+    """Return the per-process client for ``token``, created on first use"""
+    get_param = env['ir.config_parameter'].sudo().get_param
+    settings = (
+        int(get_param(PARAM_POOL_SIZE, DEFAULT_POOL_SIZE)),
+        int(get_param(PARAM_MAX_RETRIES, DEFAULT_MAX_RETRIES)),
+        float(get_param(PARAM_MAX_RETRY_WAIT, DEFAULT_MAX_RETRY_WAIT)),
+    )
+    key = (token,) + settings
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = TelegramClient(token, *settings)
+    return client
+
+
+class SenderPool:
+    """Bounded thread pool running Bot API calls concurrently
+
+    Only HTTP work is submitted here, never anything touching a cursor.
+    At most ``size`` jobs run and ``size`` more wait for a thread;
+    ``submit`` blocks while the pool is saturated.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='telegram-send')
+        self.slots = threading.BoundedSemaphore(2 * size)
+
+    def submit(self, fn, *args):
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda f: self.slots.release())
+        return future
+
+
+_sender_pools = {}
+
+
+def get_sender_pool(env):
+    """Return the per-process sender pool, created on first use"""
+    size = max(1, int(env['ir.config_parameter'].sudo().get_param(PARAM_SEND_CONCURRENCY, DEFAULT_SEND_CONCURRENCY)))
+    pool = _sender_pools.get(size)
+    if pool is None:
+        with _clients_lock:
+            pool = _sender_pools.get(size)
+            if pool is None:
+                pool = _sender_pools[size] = SenderPool(size)
+    return pool
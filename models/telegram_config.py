@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
-import requests
 import logging
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 
+from .telegram_client import TelegramApiError, get_client
+
 _logger = logging.getLogger(__name__)
 
+# Changes to these fields invalidate the cached service lookups of telegram.service
+CONFIG_LOOKUP_FIELDS = {'active', 'bot_token'}
+
 class TelegramConfig(models.Model):
     _name = 'telegram.config'
     _description = 'Telegram Configuration'
@@ -27,6 +31,23 @@ class TelegramConfig(models.Model):
     
     last_error = fields.Text('Last Error', readonly=True)
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        configs = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return configs
+
+    def write(self, vals):
+        result = super().write(vals)
+        if CONFIG_LOOKUP_FIELDS.intersection(vals):
+            self.env.registry.clear_cache()
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self.env.registry.clear_cache()
+        return result
+
     def test_connection(self):
         """Test bot connection"""
         self.ensure_one()
@@ -34,49 +55,31 @@ class TelegramConfig(models.Model):
             raise UserError(_('Bot token is required'))
         
         try:
-            url = f"https://api.telegram.org/bot{self.bot_token}/getMe"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('ok'):
-                    bot_info = result['result']
-                    self.write({
-                        'bot_username': bot_info.get('username'),
-                        'bot_status': 'configured',
-                        'last_error': False
-                    })
-                    return {
-                        'type': 'ir.actions.client',
-                        'tag': 'display_notification',
-                        'params': {
-                            'title': _('Success!'),
-                            'message': _('Bot connection successful. Bot username: @%s') % bot_info.get('username'),
-                            'type': 'success',
-                        }
-                    }
-                else:
-                    error_msg = result.get('description', 'Unknown error')
-                    self.write({
-                        'bot_status': 'error',
-                        'last_error': error_msg
-                    })
-                    raise UserError(_('Bot API error: %s') % error_msg)
-            else:
-                error_msg = f'HTTP {response.status_code}: {response.text}'
-                self.write({
-                    'bot_status': 'error',
-                    'last_error': error_msg
-                })
-                raise UserError(_('Connection failed: %s') % error_msg)
-                
-        except requests.exceptions.RequestException as e:
-            error_msg = str(e)
+            bot_info = get_client(self.env, self.bot_token).call('getMe')
+        except TelegramApiError as e:
+            error_msg = e.description
             self.write({
                 'bot_status': 'error',
                 'last_error': error_msg
             })
-            raise UserError(_('Network error: %s') % error_msg)
+            if e.error_code is None:
+                raise UserError(_('Network error: %s') % error_msg)
+            raise UserError(_('Bot API error: %s') % error_msg)
+
+        self.write({
+            'bot_username': bot_info.get('username'),
+            'bot_status': 'configured',
+            'last_error': False
+        })
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Success!'),
+                'message': _('Bot connection successful. Bot username: @%s') % bot_info.get('username'),
+                'type': 'success',
+            }
+        }
     
     def start_service(self):
         """Start Telegram service"""
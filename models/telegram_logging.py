@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""Loggers for the bot's update-handling hot path
+
+``<addon>.updates`` gets one compact INFO record per processed update and
+``<addon>.trace`` the step-by-step DEBUG tracing of message and callback
+handling. Their verbosity is set like any other Odoo logger, e.g.
+``--log-handler=odoo.addons.telegram_task_manager.trace:DEBUG``.
+"""
+import logging
+
+_addon_logger_name = __name__.rsplit('.models.', 1)[0]
+
+update_logger = logging.getLogger(f'{_addon_logger_name}.updates')
+trace_logger = logging.getLogger(f'{_addon_logger_name}.trace')
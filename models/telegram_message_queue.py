@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import math
+import time
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+from .telegram_client import TelegramApiError, get_sender_pool
+from .telegram_logging import trace_logger as _trace
+
+_logger = logging.getLogger(__name__)
+
+# Give up on a message after this many failed delivery attempts
+MAX_ATTEMPTS = 5
+# Number of queued messages sent per dispatcher batch (one commit per batch)
+DISPATCH_BATCH_SIZE = 50
+# Rate limiter waits up to this long (seconds) in-line; longer waits defer the message
+MAX_INLINE_WAIT = 0.5
+# Bot API methods counted against Telegram's per-chat and global message limits
+RATE_LIMITED_METHODS = {'sendMessage', 'sendPhoto', 'sendDocument', 'forwardMessage', 'copyMessage'}
+# In-place edits fall back to sending the content as a new message
+EDIT_METHOD = 'editMessageText'
+
+
+def _call_in_order(calls):
+    """Run ``(client, method, data)`` calls one after the other (in a sender pool thread)
+
+    Returns an ``(error, duration, result)`` triple per call made. Stops
+    after a transient error, so a chat's later messages are not sent before it.
+    """
+    results = []
+    for client, method, data in calls:
+        started = time.monotonic()
+        result = error = None
+        try:
+            result = client.call(method, data)
+        except TelegramApiError as e:
+            error = e
+        results.append((error, time.monotonic() - started, result))
+        if error is not None and error.is_transient:
+            break
+    return results
+
+
+class TelegramMessageQueue(models.Model):
+    """Outbound Telegram API calls, sent by a cron after the enqueuing transaction commits"""
+    _name = 'telegram.message.queue'
+    _description = 'Telegram Outbound Message'
+    _order = 'id desc'
+    _rec_name = 'method'
+
+    service_id = fields.Many2one('telegram.service', string='Service', required=True, ondelete='cascade', index=True)
+    method = fields.Char('API Method', required=True, default='sendMessage')
+    chat_id = fields.Char('Chat ID', index=True)
+    payload = fields.Text('Payload', required=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, index=True)
+    attempts = fields.Integer('Attempts', default=0, readonly=True)
+    date_next_attempt = fields.Datetime('Next Attempt', readonly=True)
+    date_sent = fields.Datetime('Sent At', readonly=True)
+    last_error = fields.Text('Last Error', readonly=True)
+    bulk = fields.Boolean('Bulk', default=False, readonly=True,
+                          help='Broadcast message, sent after interactive messages waiting at the same time')
+
+    @api.model
+    def _enqueue(self, service, method, payload):
+        """Queue a Telegram API call; it is only sent once the current transaction commits"""
+        message = self.create({
+            'service_id': service.id,
+            'method': method,
+            'chat_id': str(payload['chat_id']) if payload.get('chat_id') else False,
+            'payload': json.dumps(payload),
+        })
+        self._trigger_dispatch()
+        return message
+
+    @api.model
+    def _enqueue_many(self, service, method, payloads, bulk=False):
+        """Queue the same API method for many payloads with a single insert and trigger"""
+        messages = self.create([{
+            'service_id': service.id,
+            'method': method,
+            'chat_id': str(payload['chat_id']) if payload.get('chat_id') else False,
+            'payload': json.dumps(payload),
+            'bulk': bulk,
+        } for payload in payloads])
+        self._trigger_dispatch()
+        return messages
+
+    @api.model
+    def _trigger_dispatch(self, at=None):
+        """Wake up the dispatcher cron (the trigger itself is transactional)
+
+        Immediate wake-ups are collapsed into a single trigger, added when
+        the transaction commits, however many messages it queued.
+        """
+        if at is None:
+            precommit = self.env.cr.precommit
+            if precommit.data.get('telegram_dispatch_triggered'):
+                return
+            precommit.data['telegram_dispatch_triggered'] = True
+            precommit.add(self._add_dispatch_trigger)
+        else:
+            self._add_dispatch_trigger(at)
+
+    @api.model
+    def _add_dispatch_trigger(self, at=None):
+        cron = self.env.ref(f'{self._module}.ir_cron_telegram_dispatch', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger(at)
+
+    @api.model
+    def _cron_dispatch(self):
+        """Send pending messages in id order, committing after each batch
+
+        Bulk (broadcast) messages only go out when no interactive message
+        is waiting. A message is held back while an older message for the same chat is
+        waiting on a retry or on the rate limiter, so per-chat order is kept.
+        Within a batch, different chats are sent concurrently.
+        """
+        while True:
+            now = fields.Datetime.now()
+            self.env.cr.execute("""
+                SELECT q.id FROM telegram_message_queue q
+                 WHERE q.state = 'pending'
+                   AND (q.date_next_attempt IS NULL OR q.date_next_attempt <= %s)
+                   AND NOT EXISTS (
+                        SELECT 1 FROM telegram_message_queue w
+                         WHERE w.state = 'pending'
+                           AND w.chat_id = q.chat_id
+                           AND w.id < q.id
+                           AND w.date_next_attempt > %s)
+                 ORDER BY q.bulk, q.id
+                 LIMIT %s
+                   FOR UPDATE OF q SKIP LOCKED
+            """, (now, now, DISPATCH_BATCH_SIZE))
+            ids = [row[0] for row in self.env.cr.fetchall()]
+            if not ids:
+                break
+            held_chats = set()
+            by_chat = {}
+            for message in self.browse(ids):
+                if message.chat_id in held_chats:
+                    continue
+                if not message._throttle():
+                    held_chats.add(message.chat_id)
+                    continue
+                # Calls without a chat (e.g. answerCallbackQuery) are independent
+                by_chat.setdefault(message.chat_id or message.id, self.browse())
+                by_chat[message.chat_id or message.id] |= message
+            self._send_by_chat(by_chat.values())
+            self.env.cr.commit()
+
+        # Re-schedule ourselves for messages waiting on a retry backoff or the rate limiter
+        self.env.cr.execute("""
+            SELECT MIN(date_next_attempt) FROM telegram_message_queue
+             WHERE state = 'pending' AND date_next_attempt IS NOT NULL
+        """)
+        next_attempt = self.env.cr.fetchone()[0]
+        if next_attempt:
+            self._trigger_dispatch(next_attempt)
+        self.env['telegram.stats']._flush()
+
+    def _throttle(self):
+        """Wait for a send token; return False (and defer the message) if none is available soon"""
+        self.ensure_one()
+        if self.method not in RATE_LIMITED_METHODS:
+            return True
+        buckets = self.env['telegram.rate.bucket']
+        wait = buckets._acquire(self.chat_id)
+        while wait and wait <= MAX_INLINE_WAIT:
+            time.sleep(wait)
+            wait = buckets._acquire(self.chat_id)
+        if wait:
+            self.env['telegram.stats']._record('rate_limited')
+            self._defer(wait)
+            return False
+        return True
+
+    def _defer(self, seconds):
+        """Postpone the message without counting it as a failed attempt"""
+        self.date_next_attempt = fields.Datetime.now() + timedelta(seconds=math.ceil(seconds))
+
+    @api.model
+    def _send_by_chat(self, chat_messages):
+        """Send each chat's messages in order, different chats in parallel
+
+        Only the HTTP calls run in the sender pool threads; the outcomes
+        are written back in this cursor once every chat is done.
+        """
+        pool = get_sender_pool(self.env)
+        jobs = []
+        for messages in chat_messages:
+            calls = [(m.service_id._get_client(), m.method, json.loads(m.payload)) for m in messages]
+            jobs.append((messages, pool.submit(_call_in_order, calls)))
+        delivered = []
+        for messages, future in jobs:
+            # Messages after a deferred one get no outcome and stay pending
+            for message, (error, duration, result) in zip(messages, future.result()):
+                if message._record_outcome(error, duration) and isinstance(result, dict) and result.get('message_id'):
+                    delivered.append((message.chat_id, result['message_id']))
+        self.env['telegram.chat']._remember_messages(delivered)
+
+    def _record_outcome(self, error, duration):
+        """Mark the message sent, deferred, retried or failed after its API call"""
+        self.ensure_one()
+        stats = self.env['telegram.stats']
+        stats._record('api_call', duration)
+        if error is not None and self.method == EDIT_METHOD and not error.is_transient:
+            if 'message is not modified' not in error.description:
+                return self._send_instead_of_edit(error)
+            error = None  # the message already shows this content
+        if error is not None:
+            if error.error_code == 429:
+                # Flood control: queue again after Telegram's delay instead of dropping
+                _logger.warning("⚠️ Telegram flood control for chat %s, retry in %ss", self.chat_id, error.retry_after)
+                stats._record('rate_limited')
+                self._defer(error.retry_after or 1)
+            elif error.is_transient:
+                self._mark_retry(error.description, error.retry_after)
+            else:
+                # Client errors (bad chat id, blocked bot, malformed Markdown) will not succeed on retry
+                _logger.error("❌ Telegram %s failed for chat %s: %s", self.method, self.chat_id, error.description)
+                stats._record('send_failed')
+                self.write({'state': 'failed', 'attempts': self.attempts + 1, 'last_error': error.description})
+            return False
+
+        stats._record('send_ok')
+        self.write({
+            'state': 'sent',
+            'attempts': self.attempts + 1,
+            'date_sent': fields.Datetime.now(),
+            'last_error': False,
+        })
+        return True
+
+    def _send_instead_of_edit(self, error):
+        """Queue an edit that Telegram refused (message deleted, too old, a photo) as a new message"""
+        _trace.debug("✏️ Edit refused for chat %s (%s), sending a new message", self.chat_id, error.description)
+        payload = json.loads(self.payload)
+        payload.pop('message_id', None)
+        self._enqueue(self.service_id, 'sendMessage', payload)
+        self.write({'state': 'failed', 'attempts': self.attempts + 1,
+                    'last_error': f'{error.description} (sent as a new message)'})
+        return False
+
+    def _mark_retry(self, error, retry_after=None):
+        """Schedule another attempt (after Telegram's retry_after or an exponential backoff), or give up"""
+        attempts = self.attempts + 1
+        if attempts >= MAX_ATTEMPTS:
+            _logger.error("❌ Giving up on Telegram %s for chat %s: %s", self.method, self.chat_id, error)
+            self.env['telegram.stats']._record('send_failed')
+            self.write({'state': 'failed', 'attempts': attempts, 'last_error': error})
+            return
+        _logger.warning("⚠️ Telegram %s for chat %s failed, retrying: %s", self.method, self.chat_id, error)
+        self.env['telegram.stats']._record('send_retry')
+        delay = retry_after if retry_after is not None else 10 * 2 ** attempts
+        self.write({
+            'attempts': attempts,
+            'last_error': error,
+            'date_next_attempt': fields.Datetime.now() + timedelta(seconds=delay),
+        })
+
+    def action_retry(self):
+        """Put failed messages back into the queue"""
+        self.write({'state': 'pending', 'attempts': 0, 'date_next_attempt': False})
+        self._trigger_dispatch()
+
+    @api.autovacuum
+    def _gc_sent_messages(self):
+        """Drop delivered messages after a week"""
+        limit_date = fields.Datetime.now() - timedelta(days=7)
+        self.search([('state', '=', 'sent'), ('date_sent', '<', limit_date)]).unlink()
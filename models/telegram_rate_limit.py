@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import time
+
+from odoo import models, fields, api
+
+# ir.config_parameter keys and their defaults (messages per second / bucket size)
+PARAM_GLOBAL_RATE = 'telegram_task_manager.rate_global'
+PARAM_GLOBAL_BURST = 'telegram_task_manager.rate_global_burst'
+PARAM_CHAT_RATE = 'telegram_task_manager.rate_chat'
+PARAM_CHAT_BURST = 'telegram_task_manager.rate_chat_burst'
+DEFAULT_GLOBAL_RATE = 30
+DEFAULT_GLOBAL_BURST = 30
+DEFAULT_CHAT_RATE = 1
+DEFAULT_CHAT_BURST = 3
+
+GLOBAL_KEY = 'global'
+
+
+class TelegramRateBucket(models.Model):
+    """Token buckets enforcing Telegram's send limits across all Odoo workers
+
+    One row holds the global budget and one row per chat holds that chat's
+    budget. Rows are locked and refilled in a short dedicated transaction so
+    concurrent senders never hold the lock while talking to Telegram.
+    """
+    _name = 'telegram.rate.bucket'
+    _description = 'Telegram Rate Limit Bucket'
+    _log_access = False
+
+    key = fields.Char('Key', required=True)
+    tokens = fields.Float('Tokens')
+    stamp = fields.Float('Last Refill (epoch)')
+
+    _sql_constraints = [
+        ('key_uniq', 'unique(key)', 'Rate limit bucket keys must be unique.'),
+    ]
+
+    @api.model
+    def _get_limits(self, chat_id):
+        """Return ``{key: (rate, burst)}`` for the global bucket and the chat's bucket"""
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        limits = {
+            GLOBAL_KEY: (
+                float(get_param(PARAM_GLOBAL_RATE, DEFAULT_GLOBAL_RATE)),
+                float(get_param(PARAM_GLOBAL_BURST, DEFAULT_GLOBAL_BURST)),
+            ),
+        }
+        if chat_id:
+            limits[f'chat:{chat_id}'] = (
+                float(get_param(PARAM_CHAT_RATE, DEFAULT_CHAT_RATE)),
+                float(get_param(PARAM_CHAT_BURST, DEFAULT_CHAT_BURST)),
+            )
+        return limits
+
+    @api.model
+    def _acquire(self, chat_id):
+        """Take one token from the global bucket and from ``chat_id``'s bucket
+
+        Tokens are only taken when both buckets have one. Returns 0 when the
+        send may proceed, otherwise the number of seconds to wait.
+        """
+        limits = self._get_limits(chat_id)
+        keys = sorted(limits)
+        with self.env.registry.cursor() as cr:
+            now = time.time()
+            cr.execute("""
+                INSERT INTO telegram_rate_bucket (key, tokens, stamp)
+                SELECT k, b, %s FROM unnest(%s::varchar[], %s::float[]) AS t(k, b)
+                ON CONFLICT (key) DO NOTHING
+            """, (now, keys, [limits[key][1] for key in keys]))
+            # Lock in key order so concurrent acquirers cannot deadlock
+            cr.execute("""
+                SELECT key, tokens, stamp FROM telegram_rate_bucket
+                 WHERE key IN %s ORDER BY key FOR UPDATE
+            """, (tuple(keys),))
+            levels = {}
+            wait = 0.0
+            for key, tokens, stamp in cr.fetchall():
+                rate, burst = limits[key]
+                levels[key] = min(burst, tokens + max(0.0, now - stamp) * rate)
+                if levels[key] < 1:
+                    wait = max(wait, (1 - levels[key]) / rate)
+            if wait:
+                return wait
+            for key, level in levels.items():
+                cr.execute(
+                    "UPDATE telegram_rate_bucket SET tokens = %s, stamp = %s WHERE key = %s",
+                    (level - 1, now, key),
+                )
+        return 0.0
+
+    @api.autovacuum
+    def _gc_idle_buckets(self):
+        """Idle chat buckets are full again after a few seconds; drop them after an hour"""
+        self.env.cr.execute(
+            "DELETE FROM telegram_rate_bucket WHERE key != %s AND stamp < %s",
+            (GLOBAL_KEY, time.time() - 3600),
+        )
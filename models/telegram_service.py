@@ -1,11 +1,39 @@
 # -*- coding: utf-8 -*-
 import logging
-import requests
 import json
-from odoo import models, fields, api
+import time
+from datetime import timedelta
+
+import psycopg2
+
+from odoo import models, fields, api, tools
+
+from .telegram_client import TelegramApiError, get_client, get_sender_pool
+from .telegram_logging import update_logger as _update_logger, trace_logger as _trace
+from . import telegram_templates as tpl
+from .task_report import THUMBNAIL_SIZE
+from .task_manager import OPEN_STATES
+from .telegram_chat import parse_day
 
 _logger = logging.getLogger(__name__)
 
+# Tasks listed one by one in a digest message, the rest are only counted
+DIGEST_MAX_TASKS = 20
+# Changes to these fields invalidate the cached service lookups
+SERVICE_LOOKUP_FIELDS = {'bot_token', 'is_running'}
+# Tasks per page of the /tasks listing
+TASKS_PAGE_SIZE = 10
+
+def _answer_now(client, data):
+    """answerCallbackQuery call run in a sender pool thread; returns (error, monotonic finish time)"""
+    try:
+        client.call('answerCallbackQuery', data, timeout=5)
+        error = None
+    except TelegramApiError as e:
+        error = e
+    return error, time.monotonic()
+
+
 class TelegramService(models.Model):
     _name = 'telegram.service' 
     _description = 'Telegram Service Manager'
@@ -16,6 +44,57 @@ class TelegramService(models.Model):
     is_running = fields.Boolean('Is Running', default=False)
     auto_start = fields.Boolean('Auto Start on Server Start', default=True, help='Automatically start webhook when Odoo server starts')
     last_update_id = fields.Integer('Last Update ID')  # OBLIGĀTI PIEVIENO ŠO LAUKU!
+    admin_digest_mode = fields.Boolean(
+        'Admin Digest', default=False,
+        help='Collect admin notifications and send them as one summary per interval; urgent tasks are still sent at once')
+    admin_digest_interval = fields.Integer('Digest Interval (minutes)', default=60)
+    admin_digest_last = fields.Datetime('Last Digest Sent', readonly=True)
+    fast_ack = fields.Boolean(
+        'Fast Acknowledge', default=False,
+        help='Store webhook updates and answer Telegram immediately; updates are processed in the background')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        services = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return services
+
+    def write(self, vals):
+        result = super().write(vals)
+        if SERVICE_LOOKUP_FIELDS.intersection(vals):
+            self.env.registry.clear_cache()
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self.env.registry.clear_cache()
+        return result
+
+    @api.model
+    @tools.ormcache()
+    def _get_active_service_id(self):
+        """Id of the running service that receives webhook updates (cached per database)"""
+        return self.sudo().search([('is_running', '=', True)], limit=1).id
+
+    @api.model
+    def _get_active_service(self):
+        return self.browse(self._get_active_service_id())
+
+    @api.model
+    @tools.ormcache()
+    def _get_notification_service_id(self):
+        """Id of the running service of the active configuration (cached per database)"""
+        telegram_config = self.env['telegram.config'].sudo().search([('active', '=', True)], limit=1)
+        if not telegram_config or not telegram_config.bot_token:
+            return False
+        return self.sudo().search([
+            ('bot_token', '=', telegram_config.bot_token),
+            ('is_running', '=', True)
+        ], limit=1).id
+
+    @api.model
+    def _get_notification_service(self):
+        return self.browse(self._get_notification_service_id())
 
     @api.model
     def _auto_start_service(self):
@@ -39,7 +118,7 @@ class TelegramService(models.Model):
             else:
                 _logger.warning("⚠️ No auto-start service configured or missing bot token/admin ID")
         except Exception as e:
-            _logger.error(f"❌ Error auto-starting Telegram service: {e}")
+            _logger.error("❌ Error auto-starting Telegram service: %s", e)
 
     def start_service(self):
         if self.is_running:
@@ -53,53 +132,79 @@ class TelegramService(models.Model):
     def _setup_webhook(self):
         try:
             webhook_url = "https://bidsolana.xyz/telegram/webhook"
-            url = f"https://api.telegram.org/bot{self.bot_token}/setWebhook"
             data = {
                 'url': webhook_url,
                 'allowed_updates': ['message', 'callback_query']
             }
-            response = requests.post(url, json=data, timeout=10)
-            if response.ok:
-                result = response.json()
-                if result.get('ok'):
-                    self.is_running = True
-                    _logger.info(f"✅ Webhook set successfully: {webhook_url}")
-                    if self.admin_telegram_id:
-                        startup_msg = (
-                            f"🔄 **Odoo Server Started**\n\n"
-                            f"✅ Telegram Bot is active\n"
-                            f"🌐 Webhook is working\n"
-                            f"🔗 URL: {webhook_url}\n"
-                            f"🕐 Time: {fields.Datetime.now().strftime('%d.%m.%Y %H:%M:%S')}"
-                        )
-                        self._send_message(self.admin_telegram_id, startup_msg)
-                else:
-                    error_desc = result.get('description', 'Unknown error')
-                    _logger.error(f"❌ Failed to set webhook: {error_desc}")
-            else:
-                _logger.error(f"❌ HTTP error setting webhook: {response.status_code}")
+            self._get_client().call('setWebhook', data)
+            self.is_running = True
+            _logger.info("✅ Webhook set successfully: %s", webhook_url)
+            if self.admin_telegram_id:
+                startup_msg = (
+                    f"🔄 **Odoo Server Started**\n\n"
+                    f"✅ Telegram Bot is active\n"
+                    f"🌐 Webhook is working\n"
+                    f"🔗 URL: {webhook_url}\n"
+                    f"🕐 Time: {fields.Datetime.now().strftime('%d.%m.%Y %H:%M:%S')}"
+                )
+                self._send_message(self.admin_telegram_id, startup_msg)
+        except TelegramApiError as e:
+            _logger.error("❌ Failed to set webhook: %s", e.description)
         except Exception as e:
-            _logger.error(f"❌ Error setting up webhook: {e}")
+            _logger.error("❌ Error setting up webhook: %s", e)
             self.is_running = False
             
     
     def stop_service(self):
         """Stop Telegram service by removing webhook"""
         try:
-            url = f"https://api.telegram.org/bot{self.bot_token}/deleteWebhook"
-            response = requests.post(url, timeout=10)
-            
-            if response.ok:
-                _logger.info("✅ Webhook removed successfully")
-            else:
-                _logger.error(f"❌ Failed to remove webhook: {response.status_code}")
-                
-            self.is_running = False
-            _logger.info("🛑 Telegram service stopped")
-            
+            self._get_client().call('deleteWebhook')
+            _logger.info("✅ Webhook removed successfully")
+        except TelegramApiError as e:
+            _logger.error("❌ Failed to remove webhook: %s", e.description)
         except Exception as e:
-            _logger.error(f"❌ Error stopping service: {e}")
-            self.is_running = False
+            _logger.error("❌ Error stopping service: %s", e)
+        self.is_running = False
+        _logger.info("🛑 Telegram service stopped")
+
+    def _get_client(self):
+        """Pooled keep-alive HTTP client for this service's bot token"""
+        return get_client(self.env, self.bot_token)
+
+    def _process_update(self, update):
+        """Dispatch one Telegram update (from the webhook or the inbound queue)
+
+        Logs one compact record per update on the ``updates`` logger;
+        step-by-step tracing is on the ``trace`` logger at DEBUG level.
+        """
+        started = time.monotonic()
+        kind = 'message' if 'message' in update else 'callback' if 'callback_query' in update else 'other'
+        sender = (update.get('message') or update.get('callback_query') or {}).get('from', {})
+        outcome = 'ok'
+        try:
+            if kind == 'message':
+                self._handle_message(self.env, update['message'])
+            elif kind == 'callback':
+                self._handle_callback(self.env, update['callback_query'])
+            else:
+                outcome = 'ignored'
+                _trace.debug("ℹ️ Unhandled update type: %s", list(update))
+        except Exception:
+            outcome = 'error'
+            raise
+        finally:
+            duration = time.monotonic() - started
+            self.env['telegram.stats']._record('update_in', duration)
+            _update_logger.info("update=%s type=%s user=%s outcome=%s ms=%.1f",
+                                update.get('update_id'), kind, sender.get('id'), outcome, duration * 1000)
+
+    def _process_update_once(self, update):
+        """Process an update unless its update_id was already handled (Telegram redelivery)"""
+        if 'update_id' in update and not self.env['telegram.update']._claim(self, update):
+            _update_logger.info("update=%s outcome=duplicate", update['update_id'])
+            return False
+        self._process_update(update)
+        return True
 
     def _handle_message(self, env, message):
         """Handle incoming message from webhook"""
@@ -109,433 +214,592 @@ class TelegramService(models.Model):
         username = message['from'].get('username', '')
         first_name = message['from'].get('first_name', 'Unknown')
         
-        _logger.info("📨 MESSAGE RECEIVED:")
-        _logger.info(f"   User: {first_name} (@{username}) ID: {user_id}")
-        _logger.info(f"   Chat: {chat_id}")
-        _logger.info(f"   Text: '{text}'")
+        _trace.debug("📨 Message from %s (@%s) ID: %s in chat %s: %r", first_name, username, user_id, chat_id, text)
         
         # Get or create user
         telegram_user = self._get_or_create_user(env, user_id, username, first_name)
-        _logger.info(f"👤 Telegram user: {telegram_user.name} (Admin: {telegram_user.is_admin})")
+        _trace.debug("👤 Telegram user: %s (Admin: %s)", telegram_user.name, telegram_user.is_admin)
         
         # Handle photo messages for reports
         if 'photo' in message:
-            _logger.info("📸 Photo message received")
+            _trace.debug("📸 Photo message received")
             self._handle_photo_report(env, message, telegram_user)
             return
         
-        # Handle text commands
-        if text == '/start':
-            _logger.info("🚀 Processing /start command")
-            self._send_welcome(env, chat_id, telegram_user)
-        elif text == '/tasks' or 'uzdevumi' in text.lower():
-            _logger.info("📋 Processing /tasks command")
-            self._send_tasks(env, chat_id, telegram_user)
-        elif text == '/menu':
-            _logger.info("📱 Processing /menu command")
-            self._send_menu(env, chat_id)
-        elif text == '/debug':
-            _logger.info("🔧 Processing /debug command")
-            debug_msg = f"🔧 **Debug Info:**\n\n"
-            debug_msg += f"✅ **Bot Status:** Working!\n"
-            debug_msg += f"👤 **User:** {first_name}\n"
-            debug_msg += f"🆔 **User ID:** `{user_id}`\n"
-            debug_msg += f"💬 **Chat ID:** `{chat_id}`\n"
-            debug_msg += f"🏷️ **Username:** @{username or 'none'}\n"
-            debug_msg += f"👑 **Admin:** {'Yes' if telegram_user.is_admin else 'No'}\n"
-            debug_msg += f"🕐 **Time:** {fields.Datetime.now().strftime('%d.%m.%Y %H:%M:%S')}\n"
-            debug_msg += f"🌐 **Webhook:** Active\n"
-            debug_msg += f"🔗 **Database:** Connected"
-            
-            self._send_message(chat_id, debug_msg)
-            _logger.info("🔧 Debug info sent successfully")
-        elif text == '/help':
-            _logger.info("❓ Processing /help command")
-            help_msg = f"🤖 **Telegram Task Manager**\n\n"
-            help_msg += f"📋 **Commands:**\n"
-            help_msg += f"/start - Start\n"
-            help_msg += f"/tasks - Show Tasks\n"
-            help_msg += f"/menu - Main Menu\n"
-            help_msg += f"/debug - System Check\n"
-            help_msg += f"/status - Admin Status\n"
-            help_msg += f"/help - This Help\n\n"
-            help_msg += f"💡 **Tip:** Type any message to report an issue!"
-            
-            self._send_message(chat_id, help_msg)
-        elif text == '/status' and telegram_user.is_admin:
-            _logger.info("📊 Processing /status command for admin")
-            status_msg = f"📊 **Admin Status Report**\n\n"
-            
-            user_count = env['telegram.user'].search_count([('active', '=', True)])
-            admin_count = env['telegram.user'].search_count([('is_admin', '=', True)])
-            
-            total_tasks = env['task.manager'].search_count([])
-            active_tasks = env['task.manager'].search_count([('state', 'in', ['draft', 'in_progress'])])
-            status_msg += f"👥 **Users:** {user_count} (admins: {admin_count})\n"
-            status_msg += f"📋 **Tasks:** {active_tasks} active / {total_tasks} total\n"
-            status_msg += f"🤖 **Admin ID:** `{self.admin_telegram_id}`\n"
-            status_msg += f"👤 **Your ID:** `{user_id}`\n"
-            status_msg += f"🌐 **Webhook:** {'✅ Active' if self.is_running else '❌ Stopped'}\n"
-            status_msg += f"🕐 **Time:** {fields.Datetime.now().strftime('%d.%m.%Y %H:%M:%S')}"
-
-            self._send_message(chat_id, status_msg)
+        handler = self._route_text(text)
+        if handler:
+            # A command abandons any prompt still waiting for an answer
+            env['telegram.conversation']._clear_state(chat_id)
+            getattr(self, handler)(env, chat_id, telegram_user, message)
+        elif not self._continue_conversation(env, chat_id, telegram_user, message):
+            self._handle_free_text(env, chat_id, telegram_user, message)
+
+    # Command routing: other modules add commands by extending these maps
+    # with super(); handlers take (env, chat_id, telegram_user, message)
+
+    def _get_command_handlers(self):
+        """Map bot commands to the names of their handler methods"""
+        return {
+            '/start': '_command_start',
+            '/tasks': '_command_tasks',
+            '/menu': '_command_menu',
+            '/debug': '_command_debug',
+            '/help': '_command_help',
+            '/status': '_command_status',
+        }
+
+    def _get_keyword_handlers(self):
+        """Map words that trigger a command anywhere in a plain message to handler method names"""
+        return {
+            'uzdevumi': '_command_tasks',
+        }
+
+    def _get_conversation_handlers(self):
+        """Map conversation states (see telegram.conversation) to the names of the methods handling the answer
+
+        Handlers take (env, chat_id, telegram_user, res_id, message) and
+        return True once the conversation is over, False to keep waiting.
+        """
+        return {
+            'execution_day': '_answer_execution_day',
+        }
+
+    @tools.ormcache()
+    def _get_text_routes(self):
+        """Command, keyword and conversation maps, built once per registry"""
+        return self._get_command_handlers(), self._get_keyword_handlers(), self._get_conversation_handlers()
+
+    def _route_text(self, text):
+        """Name of the handler for a message text, or None for free text"""
+        commands, keywords, __ = self._get_text_routes()
+        if text.startswith('/'):
+            # "/tasks@my_bot arg" -> "/tasks"
+            command = text.split(maxsplit=1)[0].split('@', 1)[0].lower()
+            return commands.get(command)
+        for word in text.lower().split():
+            handler = keywords.get(word.strip('.,!?:;'))
+            if handler:
+                return handler
+        return None
+
+    def _command_start(self, env, chat_id, telegram_user, message):
+        _trace.debug("🚀 Processing /start command")
+        self._send_welcome(env, chat_id, telegram_user)
+
+    def _command_tasks(self, env, chat_id, telegram_user, message):
+        _trace.debug("📋 Processing /tasks command")
+        self._send_tasks(env, chat_id, telegram_user)
+
+    def _command_menu(self, env, chat_id, telegram_user, message):
+        _trace.debug("📱 Processing /menu command")
+        self._send_menu(env, chat_id)
+
+    def _command_debug(self, env, chat_id, telegram_user, message):
+        _trace.debug("🔧 Processing /debug command")
+        sender = message['from']
+        debug_msg = f"🔧 **Debug Info:**\n\n"
+        debug_msg += f"✅ **Bot Status:** Working!\n"
+        debug_msg += f"👤 **User:** {tpl.escape_markdown(sender.get('first_name', 'Unknown'))}\n"
+        debug_msg += f"🆔 **User ID:** `{sender['id']}`\n"
+        debug_msg += f"💬 **Chat ID:** `{chat_id}`\n"
+        debug_msg += f"🏷️ **Username:** @{tpl.escape_markdown(sender.get('username') or 'none')}\n"
+        debug_msg += f"👑 **Admin:** {'Yes' if telegram_user.is_admin else 'No'}\n"
+        debug_msg += f"🕐 **Time:** {fields.Datetime.now().strftime('%d.%m.%Y %H:%M:%S')}\n"
+        debug_msg += f"🌐 **Webhook:** Active\n"
+        debug_msg += f"🔗 **Database:** Connected"
+
+        self._send_message(chat_id, debug_msg)
+        _trace.debug("🔧 Debug info sent successfully")
+
+    def _command_help(self, env, chat_id, telegram_user, message):
+        _trace.debug("❓ Processing /help command")
+        help_msg = f"🤖 **Telegram Task Manager**\n\n"
+        help_msg += f"📋 **Commands:**\n"
+        help_msg += f"/start - Start\n"
+        help_msg += f"/tasks - Show Tasks\n"
+        help_msg += f"/menu - Main Menu\n"
+        help_msg += f"/debug - System Check\n"
+        help_msg += f"/status - Admin Status\n"
+        help_msg += f"/help - This Help\n\n"
+        help_msg += f"💡 **Tip:** Type any message to report an issue!"
+
+        self._send_message(chat_id, help_msg)
+
+    def _command_status(self, env, chat_id, telegram_user, message):
+        if not telegram_user.is_admin:
+            # Not a command for regular users: keep treating it as a report
+            self._handle_free_text(env, chat_id, telegram_user, message)
+            return
+        _trace.debug("📊 Processing /status command for admin")
+        status_msg = f"📊 **Admin Status Report**\n\n"
+
+        stats = env['task.dashboard'].get_dashboard_data()
+        status_msg += f"👥 **Users:** {stats['telegram_users']} (admins: {stats['admin_users']})\n"
+        status_msg += f"📋 **Tasks:** {stats['open_tasks']} active / {stats['total_tasks']} total\n"
+        status_msg += f"⚠️ **Overdue:** {stats['overdue_tasks']}\n"
+        status_msg += f"🚗 **Vehicles:** {stats['vehicles']}\n"
+        status_msg += f"✉️ **Messages today:** {stats['messages_today']}\n"
+        status_msg += self._format_traffic_stats(env['telegram.stats']._get_summary(hours=1))
+        status_msg += f"🤖 **Admin ID:** `{self.admin_telegram_id}`\n"
+        status_msg += f"👤 **Your ID:** `{message['from']['id']}`\n"
+        status_msg += f"🌐 **Webhook:** {'✅ Active' if self.is_running else '❌ Stopped'}\n"
+        status_msg += f"🕐 **Time:** {fields.Datetime.now().strftime('%d.%m.%Y %H:%M:%S')}"
+
+        self._send_message(chat_id, status_msg)
+
+    def _continue_conversation(self, env, chat_id, telegram_user, message):
+        """Hand a free-text message to the prompt waiting in the chat; False if there is none"""
+        Conversation = env['telegram.conversation']
+        state, res_id = Conversation._get_state(chat_id)
+        if not state:
+            return False
+        handler = self._get_text_routes()[2].get(state)
+        if not handler:
+            _logger.warning("❓ Unknown conversation state %s in chat %s", state, chat_id)
+            Conversation._clear_state(chat_id)
+            return False
+        _trace.debug("💬 Answer to %s (%s) in chat %s", state, res_id, chat_id)
+        if getattr(self, handler)(env, chat_id, telegram_user, res_id, message):
+            Conversation._clear_state(chat_id)
+        return True
+
+    def _answer_execution_day(self, env, chat_id, telegram_user, task_id, message):
+        """Write the day given in reply to _ask_for_execution_day to the task"""
+        task = env['task.manager'].browse(task_id).exists()
+        if not task or task.telegram_user_id != telegram_user or task.state not in OPEN_STATES:
+            self._send_message(chat_id, "❌ Task not found.", tpl.HOME_MARKUP)
+            return True
+        text = message.get('text', '')
+        day = parse_day(text, fields.Date.context_today(task))
+        if not day:
+            self._send_message(chat_id, tpl.render('execution_day_invalid', text=text[:50]), tpl.FORCE_REPLY_MARKUP)
+            return False
+        task.with_context(from_telegram=True).date_execution = day
+        self._send_message(chat_id, tpl.render('execution_day_set', title=task.title, day=day), tpl.HOME_MARKUP)
+        return True
+
+    def _handle_free_text(self, env, chat_id, telegram_user, message):
+        """Text that is not a command: a report from users, ignored from admins"""
+        text = message.get('text', '')
+        if not telegram_user.is_admin:
+            _trace.debug("📝 Treating message from %s as a report", telegram_user.name)
+            self._handle_report(env, chat_id, telegram_user, text)
         else:
-            # Handle as report (if not admin)
-            if not telegram_user.is_admin:
-                _logger.info("📝 Treating message as report from regular user")
-                _logger.info(f"📝 USER MESSAGE RECEIVED: '{text}' from {telegram_user.name}")
-                self._handle_report(env, chat_id, telegram_user, text)
-            else:
-                _logger.info("👑 Admin message - ignoring to prevent echo")
-                _logger.info(f"👑 ADMIN MESSAGE: '{text}' from {telegram_user.name}")
+            _trace.debug("👑 Ignoring admin message from %s to prevent echo: %r", telegram_user.name, text)
+
+    def _format_traffic_stats(self, summary):
+        """/status lines for the last hour of Telegram traffic"""
+        def count(metric):
+            return summary.get(metric, {}).get('count', 0)
+
+        def latency(metric):
+            entry = summary.get(metric)
+            if not entry or not entry['count']:
+                return "n/a"
+            return f"{entry['p50']:.0f}/{entry['p95']:.0f} ms"
+
+        text = f"\n📈 **Last hour:**\n"
+        text += f"📨 Updates: {count('update_in')}\n"
+        text += f"✉️ Sent: {count('send_ok')} | ❌ Failed: {count('send_failed')}\n"
+        text += f"🔁 Retries: {count('send_retry')} | 🐢 Rate limited: {count('rate_limited')}\n"
+        text += f"⏱️ API p50/p95: {latency('api_call')}\n"
+        text += f"⏱️ Webhook p50/p95: {latency('webhook')}\n"
+        text += f"⏱️ Button ack p50/p95: {latency('callback_ack')}\n\n"
+        return text
 
     def _handle_callback(self, env, callback_query):
-        """Handle button callbacks with detailed logging and proper responses"""
+        """Acknowledge a button press at once, then perform its action
+
+        The callback query is answered with the action's optimistic text
+        before any database work, so the button spinner stops right away;
+        the action then follows up with messages of its own. The time from
+        the start of processing to the answer is the callback_ack metric.
+        """
+        started = time.monotonic()
+        ack = None
+        chat_id = None
         try:
             chat_id = callback_query['message']['chat']['id']
             data = callback_query['data']
             callback_id = callback_query['id']
             user_id = callback_query['from']['id']
             user_name = callback_query['from'].get('first_name', 'Unknown')
-            
-            telegram_user = env['telegram.user'].search([('telegram_id', '=', str(user_id))], limit=1)
-            
-            _logger.info("📱 CALLBACK RECEIVED:")
-            _logger.info(f"   User: {user_name} (ID: {user_id})")
-            _logger.info(f"   Data: {data}")
-            _logger.info(f"   Chat ID: {chat_id}")
-            _logger.info(f"   Callback ID: {callback_id}")
-
-            response_text = "✅ Confirmed"
-            show_alert = False
-            
-            if data.startswith('done_'):
-                task_id = int(data.split('_')[1])
-                _logger.info(f"🎯 Marking task {task_id} as done")
-                result = self._mark_task_done(env, chat_id, task_id, telegram_user)
-                response_text = "✅ Task Completed!" if result else "❌ Error"
-                show_alert = True
-                
-            elif data.startswith('vehicle_info_'):
-                vehicle_id = int(data.split('_')[2])
-                _logger.info(f"🚗 Showing vehicle info for {vehicle_id}")
-                self._send_vehicle_info(env, chat_id, vehicle_id)
-                response_text = "ℹ️ Vehicle Information"
-                
-            elif data == 'tasks':
-                _logger.info(f"📋 Showing tasks for user")
-                self._send_tasks(env, chat_id, telegram_user)
-                response_text = "📋 Tasks"
-                
-            elif data == 'report':
-                _logger.info(f"⚠️ Report prompt requested")
-                self._send_report_prompt(env, chat_id)
-                response_text = "⚠️ Reporting Mode"
-                
-            elif data == 'menu':
-                _logger.info(f"📱 Main menu requested")
-                self._send_menu(env, chat_id)
-                response_text = "📱 Main Menu"
-                
-            elif data == 'restart_service':
-                _logger.info(f"🔄 Service restart requested by {user_name}")
-                if telegram_user and telegram_user.is_admin:
-                    service = env['telegram.service'].browse(self.id)
-                    service.stop_service()
-                    service.start_service()
-                    response_text = "🔄 Service restarted!"
-                    show_alert = True
-                else:
-                    response_text = "❌ Admin only"
-                    show_alert = True
-                
-            elif data.startswith('set_day_'):
-                task_id = int(data.split('_')[2])
-                _logger.info(f"🗓️ User wants to set execution day for task {task_id}")
-                self._ask_for_execution_day(chat_id, task_id)
-                response_text = "🗓️ Please enter the day you can complete the task!"
-                show_alert = True
-                
-            else:
-                _logger.warning(f"❓ Unknown callback data: {data}")
-                response_text = "❓ Unknown command"
-                show_alert = True
-                
-            # CRITICAL: Always answer the callback
-            self._answer_callback(callback_id, response_text, show_alert)
-            _logger.info(f"✅ Callback answered with: {response_text}")
-            
+
+            _trace.debug("📱 Callback %s from %s (ID: %s) in chat %s: %s", callback_id, user_name, user_id, chat_id, data)
+
+            handler, arg = self._route_callback(data)
+            if not handler:
+                _logger.warning("❓ Unknown callback data: %s", data)
+                ack = self._ack_callback(callback_id, "❓ Unknown command", True)
+                return
+            ack_text, show_alert = self._get_callback_routes()[1].get(handler, ("✅ OK", False))
+            ack = self._ack_callback(callback_id, ack_text, show_alert)
+
+            telegram_user = env['telegram.user']._find_by_telegram_id(user_id)
+            follow_up = getattr(self, handler)(env, chat_id, telegram_user, arg, callback_query)
+            if follow_up:
+                self._send_message(chat_id, follow_up)
+
+        except psycopg2.Error:
+            # The transaction is aborted: let the caller roll back (and retry) instead of committing it
+            raise
         except Exception as e:
-            error_msg = f"❌ Callback error: {e}"
-            _logger.error(error_msg)
+            _logger.error("❌ Callback error: %s", e)
             try:
-                self._answer_callback(callback_query.get('id', ''), "❌ System Error", True)
-                _logger.info(f"⚠️ Error callback answered")
+                if ack is None:
+                    ack = self._ack_callback(callback_query.get('id', ''), "❌ System Error", True)
+                elif chat_id:
+                    self._send_message(chat_id, "❌ System Error")
+                _trace.debug("⚠️ Error callback answered")
             except Exception as answer_error:
-                _logger.error(f"💥 Failed to answer error callback: {answer_error}")
+                _logger.error("💥 Failed to answer error callback: %s", answer_error)
+        finally:
+            if ack is not None:
+                self._finish_ack(ack, started)
+
+    def _ack_callback(self, callback_id, text, show_alert=False):
+        """Answer a callback query right away from the sender pool
+
+        Returns ``(future, data)``; the future resolves to the error (or
+        None) and the monotonic time the answer completed.
+        """
+        data = {
+            'callback_query_id': callback_id,
+            'text': text,
+            'show_alert': show_alert
+        }
+        _trace.debug("📤 Answering callback %s with: %s", callback_id, text)
+        return get_sender_pool(self.env).submit(_answer_now, self._get_client(), data), data
+
+    def _finish_ack(self, ack, started):
+        """Record the time-to-ack; queue the answer again if sending it failed transiently"""
+        future, data = ack
+        error, finished = future.result()
+        if error is None:
+            self.env['telegram.stats']._record('callback_ack', finished - started)
+        elif error.is_transient:
+            self._answer_callback(data['callback_query_id'], data['text'], data['show_alert'])
+        else:
+            # e.g. "query is too old": nothing left to answer
+            _logger.warning("⚠️ Callback %s not answered: %s", data['callback_query_id'], error.description)
+
+    # Callback routing: callback_data is "<action>" or "<action>_<number>";
+    # handlers take (env, chat_id, telegram_user, arg, callback_query) and
+    # run after the callback was answered with their text from
+    # _get_callback_acks(); they return None, or a text sent to the chat
+    # as a follow-up
+
+    def _get_callback_handlers(self):
+        """Map callback actions to the names of their handler methods"""
+        return {
+            'done': '_callback_done',
+            'vehicle_info': '_callback_vehicle_info',
+            'tasks': '_callback_tasks',
+            'tasks_page': '_callback_tasks',
+            'report': '_callback_report',
+            'menu': '_callback_menu',
+            'restart_service': '_callback_restart_service',
+            'set_day': '_callback_set_day',
+        }
+
+    def _get_callback_acks(self):
+        """Map handler method names to the (text, show_alert) the callback is answered with"""
+        return {
+            '_callback_done': ("⏳ Completing task…", False),
+            '_callback_vehicle_info': ("ℹ️ Vehicle Information", False),
+            '_callback_tasks': ("📋 Tasks", False),
+            '_callback_report': ("⚠️ Reporting Mode", False),
+            '_callback_menu': ("📱 Main Menu", False),
+            '_callback_restart_service': ("🔄 Restarting service…", False),
+            '_callback_set_day': ("🗓️ Please enter the day you can complete the task!", True),
+        }
+
+    @tools.ormcache()
+    def _get_callback_routes(self):
+        """Callback and acknowledgement maps, built once per registry"""
+        return self._get_callback_handlers(), self._get_callback_acks()
+
+    def _route_callback(self, data):
+        """Split callback data into (handler method name, numeric argument or None)"""
+        routes = self._get_callback_routes()[0]
+        action, sep, arg = data.rpartition('_')
+        if sep and arg.isdigit() and action in routes:
+            return routes[action], int(arg)
+        return routes.get(data), None
+
+    def _callback_done(self, env, chat_id, telegram_user, task_id, callback_query):
+        _trace.debug("🎯 Marking task %s as done", task_id)
+        # Success and failure are both reported by _mark_task_done itself
+        self._mark_task_done(env, chat_id, task_id, telegram_user,
+                             edit_message_id=self._get_edit_target(env, callback_query))
+
+    def _callback_vehicle_info(self, env, chat_id, telegram_user, vehicle_id, callback_query):
+        _trace.debug("🚗 Showing vehicle info for %s", vehicle_id)
+        self._send_vehicle_info(env, chat_id, vehicle_id, edit_message_id=self._get_edit_target(env, callback_query))
+
+    def _callback_tasks(self, env, chat_id, telegram_user, page, callback_query):
+        page = page or 0
+        _trace.debug("📋 Showing tasks page %s for user", page + 1)
+        self._send_tasks(env, chat_id, telegram_user, page, edit_message_id=self._get_edit_target(env, callback_query))
+
+    def _callback_report(self, env, chat_id, telegram_user, arg, callback_query):
+        _trace.debug("⚠️ Report prompt requested")
+        self._send_report_prompt(env, chat_id)
+
+    def _callback_menu(self, env, chat_id, telegram_user, arg, callback_query):
+        _trace.debug("📱 Main menu requested")
+        self._send_menu(env, chat_id, edit_message_id=self._get_edit_target(env, callback_query))
+
+    def _callback_restart_service(self, env, chat_id, telegram_user, arg, callback_query):
+        _trace.debug("🔄 Service restart requested by %s", callback_query['from'].get('first_name', 'Unknown'))
+        if not (telegram_user and telegram_user.is_admin):
+            return "❌ Admin only"
+        service = env['telegram.service'].browse(self.id)
+        service.stop_service()
+        service.start_service()
+        return "🔄 Service restarted!"
+
+    def _callback_set_day(self, env, chat_id, telegram_user, task_id, callback_query):
+        _trace.debug("🗓️ User wants to set execution day for task %s", task_id)
+        self._ask_for_execution_day(chat_id, task_id)
+
+    def _get_edit_target(self, env, callback_query):
+        """Id of the message a navigation button updates in place, or None to send a new message
+
+        Only the chat's newest bot message is edited: the user may no
+        longer see an older one, so the answer is sent below instead.
+        """
+        message = callback_query.get('message') or {}
+        if 'text' not in message:
+            # Photos have a caption instead of a text
+            return None
+        last_message_id = env['telegram.chat']._get_last_message_id(message['chat']['id'])
+        if last_message_id and message['message_id'] < last_message_id:
+            return None
+        return message['message_id']
 
     def _get_or_create_user(self, env, user_id, username, first_name):
         """Get or create telegram user with admin notification"""
-        user = env['telegram.user'].search([('telegram_id', '=', str(user_id))], limit=1)
-        if not user:
-            user = env['telegram.user'].create({
-                'name': first_name or username or f'User_{user_id}',
-                'telegram_id': str(user_id),
-                'username': username,
-                'is_admin': str(user_id) == self.admin_telegram_id,
-                'active': True
-            })
-            
+        user, created = env['telegram.user']._get_or_create(
+            user_id,
+            first_name or username or f'User_{user_id}',
+            username=username,
+            is_admin=str(user_id) == self.admin_telegram_id,
+        )
+        if created:
             if self.admin_telegram_id and str(user_id) != self.admin_telegram_id:
                 admin_text = f"👤 **New user joined!**\n\n"
                 admin_text += f"🆔 **ID:** `{user_id}`\n"
-                admin_text += f"👤 **Name:** {first_name or 'Not specified'}\n"
-                admin_text += f"🏷️ **Username:** @{username or 'none'}\n"
+                admin_text += f"👤 **Name:** {tpl.escape_markdown(first_name or 'Not specified')}\n"
+                admin_text += f"🏷️ **Username:** @{tpl.escape_markdown(username or 'none')}\n"
                 admin_text += f"🕐 **Time:** {fields.Datetime.now().strftime('%d.%m.%Y %H:%M:%S')}\n\n"
                 admin_text += f"ℹ️ User can now receive tasks."
-                
-                self._send_message(self.admin_telegram_id, admin_text)
-                _logger.info(f"✅ Admin notified about new user: {user.name}")
+
+                self._notify_admin('new_user', admin_text, f"{user.name} (@{username or 'none'}, ID {user_id})")
+                _trace.debug("✅ Admin notified about new user: %s", user.name)
                 
         return user
 
     def _send_welcome(self, env, chat_id, user):
         """Send welcome message"""
-        text = f"Hello, {user.name}! 👋\n\nTelegram Task Manager bots.\n\nPlease choose:"
-        keyboard = [
-            [{'text': '📋 Mani uzdevumi', 'callback_data': 'tasks'}],
-            [{'text': '⚠️ Ziņot problēmu', 'callback_data': 'report'}],
-            [{'text': '📱 Izvēlne', 'callback_data': 'menu'}]
-        ]
-        self._send_message(chat_id, text, keyboard)
+        self._send_message(chat_id, tpl.render('welcome', name=user.name), tpl.WELCOME_MARKUP)
 
-    def _send_menu(self, env, chat_id):
+    def _send_menu(self, env, chat_id, edit_message_id=None):
         """Send main menu"""
-        text = "📱 Main Menu:"
-        keyboard = [
-            [{'text': '📋 Tasks', 'callback_data': 'tasks'}],
-            [{'text': '⚠️ Report Issue', 'callback_data': 'report'}],
-            [{'text': '📱 Main Menu', 'callback_data': 'menu'}]
-        ]
-        self._send_message(chat_id, text, keyboard)
+        self._send_message(chat_id, tpl.render('menu'), tpl.MENU_MARKUP, edit_message_id=edit_message_id)
 
-    def _send_vehicle_info(self, env, chat_id, vehicle_id):
+    def _send_vehicle_info(self, env, chat_id, vehicle_id, edit_message_id=None):
         """Send detailed vehicle information"""
         vehicle = env['task.vehicle'].browse(vehicle_id)
         if not vehicle.exists():
             self._send_message(chat_id, "❌ Vehicle not found.")
             return
-            
-        text = f"🚗 **{vehicle.name}**\n\n"
-        
-        if vehicle.license_plate:
-            text += f"🔢 License Plate: **{vehicle.license_plate}**\n"
 
-        if vehicle.driver_name:
-            text += f"👤 Driver: {vehicle.driver_name}\n"
-
-        if hasattr(vehicle, 'vehicle_type') and vehicle.vehicle_type:
-            text += f"🏷️ Type: {vehicle.vehicle_type}\n"
-
-        if hasattr(vehicle, 'year') and vehicle.year:
-            text += f"📅 Year: {vehicle.year}\n"
-
-        status = "✅ Active" if vehicle.active else "❌ Inactive"
-        text += f"📊 Status: {status}\n"
-        
+        vehicle_type = getattr(vehicle, 'vehicle_type', False)
+        year = getattr(vehicle, 'year', False)
         task_count = env['task.manager'].search_count([
             ('vehicle_id', '=', vehicle.id),
             ('state', 'in', ['draft', 'in_progress'])
         ])
-        if task_count > 0:
-            text += f"📋 Active Tasks: {task_count}\n"
+        text = tpl.render(
+            'vehicle_info',
+            name=vehicle.name,
+            plate=tpl.render_if(vehicle.license_plate, 'vehicle_info_plate', plate=vehicle.license_plate),
+            driver=tpl.render_if(vehicle.driver_name, 'vehicle_info_driver', driver=vehicle.driver_name),
+            type=tpl.render_if(vehicle_type, 'vehicle_info_type', type=vehicle_type),
+            year=tpl.render_if(year, 'vehicle_info_year', year=year),
+            status="✅ Active" if vehicle.active else "❌ Inactive",
+            active_tasks=tpl.render_if(task_count, 'vehicle_info_active_tasks', count=task_count),
+        )
+        self._send_message(chat_id, text, tpl.VEHICLE_MARKUP, edit_message_id=edit_message_id)
 
-        keyboard = [
-            [{'text': '🏠 Main Menu', 'callback_data': 'menu'}],
-            [{'text': '📋 My Tasks', 'callback_data': 'tasks'}]
-        ]
-        
-        self._send_message(chat_id, text, keyboard)
-
-    def _send_tasks(self, env, chat_id, user):
-        """Send user tasks with enhanced debugging"""
-        _logger.info(f"🔍 SEARCHING TASKS FOR USER:")
-        _logger.info(f"   User: {user.name}")
-        _logger.info(f"   User ID: {user.id}")
-        _logger.info(f"   Telegram ID: {user.telegram_id}")
-        _logger.info(f"   Is Admin: {user.is_admin}")
+    def _send_tasks(self, env, chat_id, user, page=0, edit_message_id=None):
+        """Send one page of the user's open tasks
+
+        Only the page being shown is loaded (indexed on telegram_user_id and
+        state), so the cost does not depend on the size of the task table.
+        """
+        _trace.debug("🔍 Searching tasks for user %s (ID: %s), page %s", user.name, user.id, page + 1)
         
-        tasks = env['task.manager'].search([
+        Task = env['task.manager']
+        domain = [
             ('telegram_user_id', '=', user.id),
             ('state', 'in', ['draft', 'in_progress'])
-        ])
-        
-        _logger.info(f"   Found {len(tasks)} tasks")
-        
-        all_tasks = env['task.manager'].search([])
-        _logger.info(f"   Total tasks in system: {len(all_tasks)}")
-        
-        for task in all_tasks:
-            assigned_user = task.telegram_user_id.name if task.telegram_user_id else 'Unassigned'
-            _logger.info(f"     Task: {task.title} → {assigned_user} (telegram_user_id: {task.telegram_user_id.id if task.telegram_user_id else 'None'})")
+        ]
+        total = Task.search_count(domain)
         
-        if not tasks:
-            text = "📋 Not active tasks!\n\n"
-            text += f"🔍 **Debug info:**\n"
-            text += f"User ID: {user.id}\n"
-            text += f"Telegram ID: {user.telegram_id}\n"
-            text += f"Total in system: {len(all_tasks)} tasks"
-
-            keyboard = [[{'text': '🏠 Main Menu', 'callback_data': 'menu'}]]
-            self._send_message(chat_id, text, keyboard)
+        if not total:
+            text = tpl.render('tasks_empty', user_id=user.id, telegram_id=user.telegram_id)
+            self._send_message(chat_id, text, tpl.HOME_MARKUP, edit_message_id=edit_message_id)
             return
             
-        text = "📋 **Your Tasks:**\n\n"
+        page_count = -(-total // TASKS_PAGE_SIZE)
+        page = max(0, min(page, page_count - 1))
+        tasks = Task.search(domain, offset=page * TASKS_PAGE_SIZE, limit=TASKS_PAGE_SIZE,
+                            order='priority desc, create_date desc, id desc')
+        tasks.vehicle_id.fetch(['name', 'license_plate'])
+        
+        paging = ''
+        if page_count > 1:
+            paging = tpl.render('tasks_paging', page=page + 1, page_count=page_count, total=total)
+        chunks = [tpl.render('tasks_header', paging=paging)]
         keyboard = []
         
         for task in tasks:
-            emoji = "🔄" if task.state == 'in_progress' else "📌"
-            vehicle = f" ({task.vehicle_id.license_plate})" if task.vehicle_id else ""
-            
-            text += f"{emoji} **{task.title}**{vehicle}\n"
-            if task.description:
-                text += f"📝 {task.description}\n"
-            text += "\n"
+            chunks.append(tpl.render(
+                'tasks_item',
+                icon="🔄" if task.state == 'in_progress' else "📌",
+                title=task.title,
+                plate=tpl.render_if(task.vehicle_id, 'plate_suffix', plate=task.vehicle_id.license_plate),
+                description=tpl.render_if(task.description, 'description_line', description=task.description),
+            ))
             
             vehicle_name = task.vehicle_id.name if task.vehicle_id else ''
             if vehicle_name:
                 button_text = f'✅ Done: {vehicle_name} {task.title[:15]}...'
             else:
                 button_text = f'✅ Done: {task.title[:15]}...'
+            # The completion date is asked for the task of the pressed row
             keyboard.append([{
                 'text': button_text,
                 'callback_data': f'done_{task.id}'
+            }, {
+                'text': '🗓️ Date',
+                'callback_data': f'set_day_{task.id}'
             }])
         
-        # New button for completion date
-        keyboard.append([{
-            'text': '🗓️ Set Completion Date',
-            'callback_data': f'set_day_{task.id}'
-        }])
-        keyboard.append([{'text': '🏠 Main Menu', 'callback_data': 'menu'}])
-        self._send_message(chat_id, text, keyboard)
+        navigation = []
+        if page > 0:
+            navigation.append({'text': '⬅️ Previous', 'callback_data': f'tasks_page_{page - 1}'})
+        if page < page_count - 1:
+            navigation.append({'text': 'Next ➡️', 'callback_data': f'tasks_page_{page + 1}'})
+        if navigation:
+            keyboard.append(navigation)
+        keyboard.append([tpl.HOME_BUTTON])
+        self._send_message(chat_id, ''.join(chunks), keyboard, edit_message_id=edit_message_id)
 
-    def _mark_task_done(self, env, chat_id, task_id, user):
+    def _mark_task_done(self, env, chat_id, task_id, user, edit_message_id=None):
         """Mark task as done and return success status"""
         try:
             task = env['task.manager'].browse(task_id)
             
             if not task.exists():
-                _logger.warning(f"❌ Task {task_id} not found")
+                _logger.warning("❌ Task %s not found", task_id)
                 self._send_message(chat_id, "❌ Task not found.")
                 return False
                 
             if task.telegram_user_id != user:
-                _logger.warning(f"❌ Task {task_id} not assigned to user {user.name}")
+                _logger.warning("❌ Task %s not assigned to user %s", task_id, user.name)
                 self._send_message(chat_id, "❌ Task not assigned to you.")
                 return False
             
-            _logger.info(f"✅ Marking task '{task.title}' as done by {user.name}")
+            _trace.debug("✅ Marking task '%s' as done by %s", task.title, user.name)
             
             task.with_context(from_telegram=True).action_complete()
 
-            text = f"✅ **Task completed!**\n\n"
-            text += f"📋 **{task.title}**\n"
-            
-            if task.description:
-                text += f"📝 {task.description}\n"
-                
-            if task.vehicle_id:
-                text += f"🚗 **Vehicle:** {task.vehicle_id.name}"
-                if task.vehicle_id.license_plate:
-                    text += f" ({task.vehicle_id.license_plate})"
-                text += "\n"
-
-            text += f"⏰ **Completed:** {fields.Datetime.now().strftime('%d.%m.%Y %H:%M')}\n"
-            text += f"👤 **User:** {user.name}"
-
-            keyboard = [
-                [{'text': '📋 Other Tasks', 'callback_data': 'tasks'}],
-                [{'text': '🏠 Main Menu', 'callback_data': 'menu'}]
-            ]
-            self._send_message(chat_id, text, keyboard)
+            completed = fields.Datetime.now()
+            vehicle = self._render_vehicle_field(task.vehicle_id)
+            text = tpl.render(
+                'task_done',
+                title=task.title,
+                description=tpl.render_if(task.description, 'description_line', description=task.description),
+                vehicle=vehicle,
+                completed=completed,
+                user=user.name,
+            )
+            self._send_message(chat_id, text, tpl.TASK_DONE_MARKUP, edit_message_id=edit_message_id)
             
             # Send notification to admin
-            admin_text = f"🎉 **TASK COMPLETEDS!**\n\n"
-            admin_text += f"👤 **User:** {user.name}\n"
-            admin_text += f"📋 **Task:** {task.title}\n"
-
-            if task.description:
-                admin_text += f"📝 **Description:** {task.description}\n"
-
-            if task.vehicle_id:
-                admin_text += f"🚗 **Vehicle:** {task.vehicle_id.name}"
-                if task.vehicle_id.license_plate:
-                    admin_text += f" ({task.vehicle_id.license_plate})"
-                admin_text += "\n"
-                
-            if task.priority:
-                priority_emoji = {'low': '🟢', 'normal': '🟡', 'high': '🔴', 'urgent': '🚨'}.get(task.priority, '📌')
-                admin_text += f"⚡ **Priority:** {priority_emoji} {dict(task._fields['priority'].selection).get(task.priority, task.priority)}\n"
-
-            admin_text += f"⏰ **Completed:** {fields.Datetime.now().strftime('%d.%m.%Y %H:%M')}\n"
-            admin_text += f"📊 **Status:** Completed"
+            priority_icon, priority_text = tpl.PRIORITY_LABELS.get(task.priority, tpl.PRIORITY_LABELS['1'])
+            admin_text = tpl.render(
+                'task_done_admin',
+                user=user.name,
+                title=task.title,
+                description=tpl.render_if(task.description, 'description_field', description=task.description),
+                vehicle=vehicle,
+                priority_icon=priority_icon,
+                priority=priority_text,
+                completed=completed,
+            )
 
             if self.admin_telegram_id:
-                _logger.info(f"📤 Sending completion notification to admin {self.admin_telegram_id}")
-                self._send_message(self.admin_telegram_id, admin_text)
-                _logger.info(f"✅ Admin notification sent successfully")
+                _trace.debug("📤 Sending completion notification to admin %s", self.admin_telegram_id)
+                self._notify_admin('task_done', admin_text, f"{task.title} — {user.name}",
+                                   urgent=task.priority == '3')
             else:
-                _logger.error(f"❌ No admin telegram ID configured!")
+                _logger.error("❌ No admin telegram ID configured!")
                 
             return True
             
+        except psycopg2.Error:
+            # The transaction is aborted: nothing can be written or queued in it any more
+            raise
         except Exception as e:
-            error_msg = f"❌ Error marking task {task_id} as done: {e}"
-            _logger.error(error_msg)
+            _logger.error("❌ Error marking task %s as done: %s", task_id, e)
             self._send_message(chat_id, "❌ Error marking task as completed.")
             return False
 
+    def _render_vehicle_field(self, vehicle):
+        """"🚗 Vehicle: name (plate)" line of admin and completion messages, or ''"""
+        if not vehicle:
+            return ''
+        return tpl.render(
+            'vehicle_field',
+            name=vehicle.name,
+            plate=tpl.render_if(vehicle.license_plate, 'plate_suffix', plate=vehicle.license_plate),
+        )
+
     def _send_report_prompt(self, env, chat_id):
         """Send report prompt"""
-        text = "⚠️ **Report an issue**\n\nPlease describe the issue:"
-        keyboard = [[{'text': '🏠 Main Menu', 'callback_data': 'menu'}]]
-        self._send_message(chat_id, text, keyboard)
+        self._send_message(chat_id, tpl.render('report_prompt'), tpl.HOME_MARKUP)
 
     def _handle_report(self, env, chat_id, user, text):
         """Handle user report with detailed logging"""
-        _logger.info(f"📝 HANDLING REPORT:")
-        _logger.info(f"   User: {user.name} (ID: {user.id})")
-        _logger.info(f"   Chat ID: {chat_id}")
-        _logger.info(f"   Text: '{text}'")
-        _logger.info(f"   Is Admin: {user.is_admin}")
+        _trace.debug("📝 Report from %s (ID: %s, admin: %s) in chat %s: %r", user.name, user.id, user.is_admin, chat_id, text)
         
         if user.is_admin:
-            _logger.info("👑 Skipping report creation for admin")
+            _trace.debug("👑 Skipping report creation for admin")
             return
             
-        _logger.info("💾 Creating report in database...")
+        _trace.debug("💾 Creating report in database...")
         report = env['task.report'].create({
             'name': f'Report from {user.name}',
             'description': text,
             'telegram_user_id': user.id,
             'state': 'new'
         })
-        _logger.info(f"✅ Report created with ID: {report.id}")
+        _trace.debug("✅ Report created with ID: %s", report.id)
 
-        confirm_text = "✅ **Report sent!**\n\nThe administrator will review it."
-        keyboard = [[{'text': '🏠 Main Menu', 'callback_data': 'menu'}]]
-        _logger.info(f"📤 Sending confirmation to user...")
-        self._send_message(chat_id, confirm_text, keyboard)
-        _logger.info(f"✅ User confirmation sent")
+        _trace.debug("📤 Sending confirmation to user...")
+        self._send_message(chat_id, tpl.render('report_sent'), tpl.HOME_MARKUP)
+        _trace.debug("✅ User confirmation sent")
         
         if self.admin_telegram_id:
-            admin_text = f"⚠️ **New report!**\n👤 {user.name}\n📝 {text}"
-            _logger.info(f"📤 Sending notification to admin {self.admin_telegram_id}...")
-            self._send_message(self.admin_telegram_id, admin_text)
-            _logger.info(f"✅ Admin notification sent")
+            admin_text = tpl.render('report_admin', user=user.name, text=text)
+            _trace.debug("📤 Sending notification to admin %s...", self.admin_telegram_id)
+            self._notify_admin('report', admin_text, f"{user.name}: {text[:80]}")
         else:
-            _logger.warning(f"⚠️ No admin telegram ID configured!")
+            _logger.warning("⚠️ No admin telegram ID configured!")
 
     def _handle_photo_report(self, env, message, user):
         """Handle photo report"""
@@ -543,54 +807,77 @@ class TelegramService(models.Model):
         caption = message.get('caption', 'Photo report')
         photos = message['photo']
         
-        largest_photo = max(photos, key=lambda p: p['file_size'])
-        photo_url = self._get_file_url(largest_photo['file_id'])
-        
+        # Sizes come smallest first; the file itself is downloaded in the background
+        photos = sorted(photos, key=lambda p: p.get('width', 0) * p.get('height', 0))
+        largest_photo = photos[-1]
+        thumbnail = next((p for p in photos if min(p.get('width', 0), p.get('height', 0)) >= THUMBNAIL_SIZE),
+                         largest_photo)
+
         env['task.report'].create({
             'name': f'Photo Report from {user.name}',
             'description': caption,
             'telegram_user_id': user.id,
-            'photo_urls': photo_url,
+            'photo_file_id': largest_photo['file_id'],
+            'telegram_service_id': self.id,
+            'photo_file_unique_id': largest_photo.get('file_unique_id'),
+            'photo_thumb_file_id': thumbnail['file_id'],
+            'photo_state': 'pending',
             'state': 'new'
         })
 
-        confirm_text = "✅ **Photo report sent!**\n\nThe administrator will review it."
-        keyboard = [[{'text': '🏠 Main Menu', 'callback_data': 'menu'}]]
-        self._send_message(chat_id, confirm_text, keyboard)
+        self._send_message(chat_id, tpl.render('photo_report_sent'), tpl.HOME_MARKUP)
 
-        admin_text = f"📸 **New photo report!**\n👤 {user.name}\n📝 {caption}"
-        self._send_message(self.admin_telegram_id, admin_text)
-        
-        self._forward_photo_to_admin(largest_photo['file_id'], admin_text)
+        admin_text = tpl.render('photo_report_admin', user=user.name, caption=caption)
+        self._notify_admin('photo_report', admin_text, f"{user.name}: {caption[:80]}",
+                           photo=largest_photo['file_id'])
 
-    def _get_file_url(self, file_id):
-        """Get file URL from Telegram"""
-        try:
-            url = f"https://api.telegram.org/bot{self.bot_token}/getFile"
-            response = requests.get(url, params={'file_id': file_id}, timeout=10)
-            if response.ok:
-                file_path = response.json()['result']['file_path']
-                return f"https://api.telegram.org/file/bot{self.bot_token}/{file_path}"
-        except Exception as e:
-            _logger.error("Error getting file URL: %s", e)
-        return None
+    def _notify_admin(self, event_type, text, summary, urgent=False, photo=None):
+        """Send a notification to the admin now, or collect it for the next digest
+
+        text is the full Markdown message, summary the plain one-line
+        version listed in the digest; photo is a Telegram file_id sent
+        along with the message.
+        """
+        if not self.admin_telegram_id:
+            return False
+        if self.admin_digest_mode and not urgent:
+            self.env['telegram.admin.event']._add(self, event_type, summary)
+            return True
+        self._send_message(self.admin_telegram_id, text)
+        if photo:
+            self._forward_photo_to_admin(photo, text)
+        _trace.debug("✅ Admin notified: %s", event_type)
+        return True
+
+    def _get_next_digest_date(self):
+        """When the next admin digest is due: one interval after the last digest (or the oldest pending event)"""
+        start = self.admin_digest_last
+        if not start:
+            oldest = self.env['telegram.admin.event'].search([('service_id', '=', self.id)], order='id', limit=1)
+            start = oldest.create_date or fields.Datetime.now()
+        return start + timedelta(minutes=max(self.admin_digest_interval, 1))
 
     def _forward_photo_to_admin(self, file_id, caption):
         """Forward photo to admin"""
-        try:
-            url = f"https://api.telegram.org/bot{self.bot_token}/sendPhoto"
-            data = {
-                'chat_id': self.admin_telegram_id,
-                'photo': file_id,
-                'caption': caption
-            }
-            requests.post(url, json=data, timeout=10)
-        except Exception as e:
-            _logger.error("Error forwarding photo: %s", e)
+        self._enqueue_api_call('sendPhoto', {
+            'chat_id': self.admin_telegram_id,
+            'photo': file_id,
+            'caption': caption,
+            'parse_mode': 'Markdown'
+        })
+
+    def _enqueue_api_call(self, method, data):
+        """Queue a Telegram API call to be sent after the current transaction commits"""
+        return self.env['telegram.message.queue']._enqueue(self, method, data)
 
-    def _send_message(self, chat_id, text, keyboard=None):
-        """Send message to Telegram with enhanced logging"""
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+    def _send_message(self, chat_id, text, keyboard=None, edit_message_id=None):
+        """Queue a message to Telegram
+
+        keyboard is a list of inline keyboard rows, or a reply markup
+        already serialized to JSON (see telegram_templates). With
+        edit_message_id, that message is edited in place instead; the
+        dispatcher sends a new message if Telegram refuses the edit.
+        """
         data = {
             'chat_id': chat_id,
             'text': text,
@@ -598,50 +885,29 @@ class TelegramService(models.Model):
         }
         
         if keyboard:
-            reply_markup = {'inline_keyboard': keyboard}
-            data['reply_markup'] = json.dumps(reply_markup)
-            
-        try:
-            _logger.info(f"📤 Sending message to {chat_id}: {text[:50]}...")
-            response = requests.post(url, json=data, timeout=10)
+            data['reply_markup'] = keyboard if isinstance(keyboard, str) else json.dumps({'inline_keyboard': keyboard})
+
+        if edit_message_id:
+            data['message_id'] = edit_message_id
+            _trace.debug("📤 Queueing edit of message %s in %s: %s...", edit_message_id, chat_id, text[:50])
+            self._enqueue_api_call('editMessageText', data)
+            return True
             
-            if response.ok:
-                _logger.info(f"✅ Message sent successfully")
-                return True
-            else:
-                error_data = response.json()
-                error_desc = error_data.get('description', 'Unknown error')
-                _logger.error(f"❌ Failed to send message: {error_desc}")
-                return False
-                
-        except Exception as e:
-            _logger.error(f"❌ Error sending message: {e}")
-            return False
+        _trace.debug("📤 Queueing message to %s: %s...", chat_id, text[:50])
+        self._enqueue_api_call('sendMessage', data)
+        return True
 
     def _answer_callback(self, callback_id, text="✅ OK", show_alert=False):
-        """Answer callback query with proper feedback"""
-        url = f"https://api.telegram.org/bot{self.bot_token}/answerCallbackQuery"
-        
+        """Queue an answer to a callback query (fallback when the immediate answer failed)"""
         data = {
             'callback_query_id': callback_id,
             'text': text,
             'show_alert': show_alert
         }
         
-        try:
-            _logger.info(f"📤 Answering callback {callback_id} with: {text}")
-            response = requests.post(url, json=data, timeout=10)
-            
-            if response.ok:
-                _logger.info(f"✅ Callback answered successfully")
-                return True
-            else:
-                _logger.error(f"❌ Failed to answer callback: {response.text}")
-                return False
-                
-        except Exception as e:
-            _logger.error(f"💥 Error answering callback: {e}")
-            return False
+        _trace.debug("📤 Queueing answer to callback %s with: %s", callback_id, text)
+        self._enqueue_api_call('answerCallbackQuery', data)
+        return True
 
     def send_task_notification(self, task):
         """Send detailed task notification to user"""
@@ -650,43 +916,56 @@ class TelegramService(models.Model):
             return
             
         if task.telegram_user_id.telegram_id == self.admin_telegram_id:
-            _logger.info("ℹ️ Task assigned to admin - sending admin-specific notification instead")
+            _trace.debug("ℹ️ Task assigned to admin - sending admin-specific notification instead")
             self._send_admin_task_notification(task)
             return
             
-        _logger.info(f"📤 Sending task notification to USER: {task.telegram_user_id.name} (ID: {task.telegram_user_id.telegram_id})")
-
-        text = f"📋 **New task!**\n\n"
-        text += f"**{task.title}**\n"
+        priority_icon, priority_text = self._send_task_message(task)
         
-        if task.description:
-            text += f"📝 {task.description}\n\n"
-        
-        if task.vehicle_id:
-            vehicle_info = f"🚗 **{task.vehicle_id.name}**"
-            if task.vehicle_id.license_plate:
-                vehicle_info += f" ({task.vehicle_id.license_plate})"
-            if task.vehicle_id.driver_name:
-                vehicle_info += f"\n👤 Driver: {task.vehicle_id.driver_name}"
-            text += vehicle_info + "\n"
-        
-        priority_icons = {'0': '🔵', '1': '🟡', '2': '🟠', '3': '🔴'}
-        priority_texts = {'0': 'Low', '1': 'Normal', '2': 'High', '3': 'Urgent'}
-        priority_icon = priority_icons.get(task.priority, '🟡')
-        priority_text = priority_texts.get(task.priority, 'Normal')
-        text += f"{priority_icon} Priority: {priority_text}\n"
-
-        state_icons = {'draft': '📝', 'in_progress': '🔄', 'completed': '✅', 'cancelled': '❌'}
-        state_texts = {'draft': 'Draft', 'in_progress': 'In Progress', 'completed': 'Completed', 'cancelled': 'Cancelled'}
-        state_icon = state_icons.get(task.state, '📝')
-        state_text = state_texts.get(task.state, 'Unknown')
-        text += f"{state_icon} Status: {state_text}\n"
-        
-        if task.date_deadline:
-            text += f"⏰ Deadline: {task.date_deadline.strftime('%d.%m.%Y %H:%M')}\n"
+        if self.admin_telegram_id and task.telegram_user_id.telegram_id != self.admin_telegram_id:
+            _trace.debug("📤 Sending ADMIN notification about task assignment to: %s", task.telegram_user_id.name)
+            admin_text = tpl.render(
+                'task_assigned_admin',
+                user=task.telegram_user_id.name,
+                title=task.title,
+                description=tpl.render_if(task.description, 'description_field', description=task.description),
+                vehicle=self._render_vehicle_field(task.vehicle_id),
+                priority_icon=priority_icon,
+                priority=priority_text,
+                created=fields.Datetime.now(),
+            )
+
+            self._notify_admin('task_assigned', admin_text, f"{task.title} → {task.telegram_user_id.name}",
+                               urgent=task.priority == '3')
+        else:
+            _trace.debug("ℹ️ Skipping admin notification (task assigned to admin or no admin ID)")
 
-        if task.progress > 0:
-            text += f"📊 Progress: {task.progress:.0f}%\n"
+    def _send_task_message(self, task):
+        """Send the detailed task message (with action buttons) to the task's Telegram user"""
+        _trace.debug("📤 Sending task notification to USER: %s (ID: %s)", task.telegram_user_id.name, task.telegram_user_id.telegram_id)
+
+        vehicle = ''
+        if task.vehicle_id:
+            vehicle = tpl.render(
+                'task_new_vehicle',
+                name=task.vehicle_id.name,
+                plate=tpl.render_if(task.vehicle_id.license_plate, 'plate_suffix', plate=task.vehicle_id.license_plate),
+                driver=tpl.render_if(task.vehicle_id.driver_name, 'task_new_driver', driver=task.vehicle_id.driver_name),
+            )
+        priority_icon, priority_text = tpl.PRIORITY_LABELS.get(task.priority, tpl.PRIORITY_LABELS['1'])
+        state_icon, state_text = tpl.STATE_LABELS.get(task.state, ('📝', 'Unknown'))
+        text = tpl.render(
+            'task_new',
+            title=task.title,
+            description=tpl.render_if(task.description, 'task_new_description', description=task.description),
+            vehicle=vehicle,
+            priority_icon=priority_icon,
+            priority=priority_text,
+            state_icon=state_icon,
+            state=state_text,
+            deadline=tpl.render_if(task.date_deadline, 'task_new_deadline', deadline=task.date_deadline),
+            progress=tpl.render_if(task.progress > 0, 'task_new_progress', progress=task.progress),
+        )
             
         keyboard = []
         
@@ -706,49 +985,85 @@ class TelegramService(models.Model):
         ])
         
         self._send_message(task.telegram_user_id.telegram_id, text, keyboard)
-        _logger.info(f"✅ Task notification sent to USER: {task.telegram_user_id.name}")
-        
-        if self.admin_telegram_id and task.telegram_user_id.telegram_id != self.admin_telegram_id:
-            _logger.info(f"📤 Sending ADMIN notification about task assignment to: {task.telegram_user_id.name}")
-            admin_text = f"📋 **New task assigned to employee!**\n\n"
-            admin_text += f"👤 **Employee:** {task.telegram_user_id.name}\n"
-            admin_text += f"📋 **Task:** {task.title}\n"
+        _trace.debug("✅ Task notification sent to USER: %s", task.telegram_user_id.name)
+        return priority_icon, priority_text
 
-            if task.description:
-                admin_text += f"📝 **Description:** {task.description}\n"
+    def send_task_notifications(self, tasks):
+        """Notify the assignees of many tasks at once
 
-            if task.vehicle_id:
-                admin_text += f"🚗 **Vehicle:** {task.vehicle_id.name}"
-                if task.vehicle_id.license_plate:
-                    admin_text += f" ({task.vehicle_id.license_plate})"
-                admin_text += "\n"
+        Each Telegram user receives one message: the detailed notification
+        when they got a single task, a digest otherwise. The admin receives
+        one summary for the whole batch.
+        """
+        tasks = tasks.filtered(lambda t: t.telegram_user_id.telegram_id)
+        if len(tasks) == 1:
+            return self.send_task_notification(tasks)
 
-            admin_text += f"{priority_icon} **Priority:** {priority_text}\n"
-            admin_text += f"⏰ **Created:** {fields.Datetime.now().strftime('%d.%m.%Y %H:%M')}"
+        for telegram_user, user_tasks in tasks.grouped('telegram_user_id').items():
+            if len(user_tasks) == 1:
+                self._send_task_message(user_tasks)
+            else:
+                self._send_task_digest(telegram_user, user_tasks)
 
-            self._send_message(self.admin_telegram_id, admin_text)
-            _logger.info(f"✅ Admin notified about task assignment to: {task.telegram_user_id.name}")
-        else:
-            _logger.info(f"ℹ️ Skipping admin notification (task assigned to admin or no admin ID)")
+        employee_tasks = tasks.filtered(lambda t: t.telegram_user_id.telegram_id != self.admin_telegram_id)
+        if self.admin_telegram_id and employee_tasks:
+            admin_text = f"📋 **{len(employee_tasks)} new tasks assigned!**\n\n"
+            per_user = []
+            by_user = list(employee_tasks.grouped('telegram_user_id').items())
+            for telegram_user, user_tasks in by_user[:DIGEST_MAX_TASKS]:
+                admin_text += f"👤 {tpl.markdown_bold(telegram_user.name + ':')} {len(user_tasks)}\n"
+                per_user.append(f"{telegram_user.name}: {len(user_tasks)}")
+            if len(by_user) > DIGEST_MAX_TASKS:
+                admin_text += f"… and {len(by_user) - DIGEST_MAX_TASKS} more users\n"
+            admin_text += f"\n⏰ **Created:** {fields.Datetime.now().strftime('%d.%m.%Y %H:%M')}"
+            self._notify_admin('task_assigned', admin_text,
+                               f"{len(employee_tasks)} tasks → {len(by_user)} users: {', '.join(per_user)}",
+                               urgent=any(task.priority == '3' for task in employee_tasks))
+
+    def _send_task_digest(self, telegram_user, tasks):
+        """Send one message listing several new tasks to a Telegram user"""
+        text = f"📋 **{len(tasks)} new tasks!**\n\n"
+        keyboard = []
+        for task in tasks[:DIGEST_MAX_TASKS]:
+            text += tpl.render(
+                'digest_item',
+                title=task.title,
+                plate=tpl.render_if(task.vehicle_id.license_plate, 'plate_suffix', plate=task.vehicle_id.license_plate),
+                deadline=tpl.render_if(task.date_deadline, 'digest_deadline', deadline=task.date_deadline),
+            )
+            keyboard.append([{'text': f'✅ Done: {task.title[:25]}', 'callback_data': f'done_{task.id}'}])
+        if len(tasks) > DIGEST_MAX_TASKS:
+            text += f"\n… and {len(tasks) - DIGEST_MAX_TASKS} more"
+        keyboard.append([{'text': '📋 All tasks', 'callback_data': 'tasks'}])
+        self._send_message(telegram_user.telegram_id, text, keyboard)
+
+    def send_deadline_reminders(self, tasks):
+        """Send each assignee one reminder listing their tasks that are due soon"""
+        tasks = tasks.filtered(lambda t: t.telegram_user_id.telegram_id)
+        for telegram_user, user_tasks in tasks.grouped('telegram_user_id').items():
+            self._send_deadline_reminder(telegram_user, user_tasks.sorted('date_deadline'))
+
+    def _send_deadline_reminder(self, telegram_user, tasks):
+        """Send one message listing tasks approaching their deadline to a Telegram user"""
+        now = fields.Datetime.now()
+        text = f"⏰ **{len(tasks)} task(s) due soon!**\n\n"
+        keyboard = []
+        for task in tasks[:DIGEST_MAX_TASKS]:
+            hours_left = max(int((task.date_deadline - now).total_seconds() // 3600), 0)
+            due_in = f"{hours_left}h" if hours_left else "less than 1h"
+            text += tpl.render('reminder_item', title=task.title, deadline=task.date_deadline, due_in=due_in)
+            keyboard.append([{'text': f'✅ Done: {task.title[:25]}', 'callback_data': f'done_{task.id}'}])
+        if len(tasks) > DIGEST_MAX_TASKS:
+            text += f"\n… and {len(tasks) - DIGEST_MAX_TASKS} more"
+        keyboard.append([{'text': '📋 All tasks', 'callback_data': 'tasks'}])
+        self._send_message(telegram_user.telegram_id, text, keyboard)
 
     def _ask_for_execution_day(self, chat_id, task_id):
-        """Send message asking for execution day"""
-        text = f"🗓️ Please enter the day you can complete the task (e.g., '2025-08-15' or 'Friday')!"
-        # ForceReply, lai Telegram klients parāda atbildes lauku
-        reply_markup = json.dumps({"force_reply": True})
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-        data = {
-            'chat_id': chat_id,
-            'text': text,
-            'parse_mode': 'Markdown',
-            'reply_markup': reply_markup
-        }
-        try:
-            _logger.info(f"📤 Asking for execution day for task {task_id} to chat {chat_id}")
-            response = requests.post(url, json=data, timeout=10)
-            if response.ok:
-                _logger.info(f"✅ Execution day request sent successfully")
-            else:
-                _logger.error(f"❌ Failed to send execution day request: {response.text}")
-        except Exception as e:
-            _logger.error(f"❌ Error sending execution day request: {e}")
+        """Ask for the execution day of a task; the reply is routed by the chat's conversation state"""
+        task = self.env['task.manager'].browse(task_id).exists()
+        if not task:
+            self._send_message(chat_id, "❌ Task not found.", tpl.HOME_MARKUP)
+            return
+        self.env['telegram.conversation']._set_state(chat_id, 'execution_day', task.id)
+        _trace.debug("📤 Asking for execution day for task %s to chat %s", task_id, chat_id)
+        self._send_message(chat_id, tpl.render('execution_day_prompt', title=task.title), tpl.FORCE_REPLY_MARKUP)
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+import bisect
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import psycopg2
+
+from odoo import models, fields, api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+# Width of one stats row in time
+BUCKET_SECONDS = 15 * 60
+# A worker writes its in-memory counters to the database at most this often
+FLUSH_INTERVAL = 60
+# Upper bounds (ms) of the latency histogram bins; the last bin is open-ended
+LATENCY_BINS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Days stats rows are kept
+STATS_RETENTION_DAYS = 30
+
+METRICS = [
+    ('update_in', 'Inbound Updates'),
+    ('webhook', 'Webhook Requests'),
+    ('api_call', 'API Calls'),
+    ('send_ok', 'Messages Sent'),
+    ('send_failed', 'Send Failures'),
+    ('send_retry', 'Send Retries'),
+    ('rate_limited', 'Rate Limited'),
+    ('callback_ack', 'Callback Acknowledgements'),
+]
+
+
+def _percentile(histogram, max_ms, fraction):
+    """Upper bound of the histogram bin holding the given fraction of samples"""
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    rank = fraction * total
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= rank:
+            return float(min(LATENCY_BINS[index], max_ms)) if index < len(LATENCY_BINS) else max_ms
+    return max_ms
+
+
+class MetricsCollector:
+    """Per-process counters and latency histograms, keyed by database
+
+    Recording only touches memory; the owner flushes the accumulated
+    entries into telegram.stats every FLUSH_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.last_flush = {}
+
+    def add(self, dbname, metric, duration_ms=None):
+        """Record one event; return True when the database is due for a flush"""
+        now = time.time()
+        bucket = datetime.fromtimestamp(now // BUCKET_SECONDS * BUCKET_SECONDS, timezone.utc).replace(tzinfo=None)
+        with self.lock:
+            entry = self.pending.setdefault(dbname, {}).setdefault(
+                (bucket, metric), [0, [0] * (len(LATENCY_BINS) + 1), 0.0])
+            entry[0] += 1
+            if duration_ms is not None:
+                entry[1][bisect.bisect_left(LATENCY_BINS, duration_ms)] += 1
+                entry[2] = max(entry[2], duration_ms)
+            last_flush = self.last_flush.setdefault(dbname, now)
+            return now - last_flush >= FLUSH_INTERVAL
+
+    def drain(self, dbname):
+        """Take the pending entries of a database"""
+        with self.lock:
+            self.last_flush[dbname] = time.time()
+            return self.pending.pop(dbname, {})
+
+    def restore(self, dbname, entries):
+        """Put back entries whose flush failed, merging with newer ones"""
+        with self.lock:
+            pending = self.pending.setdefault(dbname, {})
+            for key, (count, histogram, max_ms) in entries.items():
+                entry = pending.setdefault(key, [0, [0] * (len(LATENCY_BINS) + 1), 0.0])
+                entry[0] += count
+                entry[1] = [a + b for a, b in zip(entry[1], histogram)]
+                entry[2] = max(entry[2], max_ms)
+
+
+_collector = MetricsCollector()
+
+
+class TelegramStats(models.Model):
+    """Telegram traffic counters and latencies aggregated in fixed time buckets"""
+    _name = 'telegram.stats'
+    _description = 'Telegram Statistics'
+    _order = 'bucket_start desc, metric'
+    _rec_name = 'metric'
+    _log_access = False
+
+    bucket_start = fields.Datetime('Period Start', required=True, readonly=True, index=True)
+    metric = fields.Selection(METRICS, string='Metric', required=True, readonly=True)
+    count = fields.Integer('Count', readonly=True, aggregator='sum')
+    latency_histogram = fields.Text('Latency Histogram', readonly=True)
+    latency_p50 = fields.Float('p50 (ms)', readonly=True, digits=(16, 1), aggregator='max')
+    latency_p95 = fields.Float('p95 (ms)', readonly=True, digits=(16, 1), aggregator='max')
+    latency_max = fields.Float('Max (ms)', readonly=True, digits=(16, 1), aggregator='max')
+
+    _sql_constraints = [
+        ('bucket_metric_uniq', 'unique(bucket_start, metric)', 'One stats row per metric and period.'),
+    ]
+
+    @api.model
+    def _record(self, metric, duration=None):
+        """Count one event (with its duration in seconds, if timed) in this worker's memory"""
+        duration_ms = duration * 1000 if duration is not None else None
+        if _collector.add(self.env.cr.dbname, metric, duration_ms):
+            self._flush()
+
+    @api.model
+    def _flush(self):
+        """Write this worker's pending metrics, in a separate transaction"""
+        dbname = self.env.cr.dbname
+        entries = _collector.drain(dbname)
+        if not entries:
+            return
+        try:
+            with self.env.registry.cursor() as cr:
+                api.Environment(cr, SUPERUSER_ID, {})['telegram.stats']._merge(entries)
+        except psycopg2.Error as e:
+            # Typically a concurrent flush of the same bucket; try again next time
+            _logger.debug("Telegram stats flush postponed: %s", e)
+            _collector.restore(dbname, entries)
+        except Exception:
+            _logger.exception("Telegram stats flush failed")
+            _collector.restore(dbname, entries)
+
+    @api.model
+    def _merge(self, entries):
+        """Add in-memory entries to their stats rows (locked in key order)"""
+        cr = self.env.cr
+        for (bucket, metric), (count, histogram, max_ms) in sorted(entries.items()):
+            cr.execute("""
+                INSERT INTO telegram_stats (bucket_start, metric, count) VALUES (%s, %s, 0)
+                ON CONFLICT (bucket_start, metric) DO NOTHING
+            """, (bucket, metric))
+            cr.execute("""
+                SELECT id, count, latency_histogram, latency_max FROM telegram_stats
+                 WHERE bucket_start = %s AND metric = %s
+                   FOR UPDATE
+            """, (bucket, metric))
+            row_id, row_count, row_histogram, row_max = cr.fetchone()
+            if row_histogram:
+                histogram = [a + b for a, b in zip(json.loads(row_histogram), histogram)]
+            max_ms = max(max_ms, row_max or 0.0)
+            timed = any(histogram)
+            cr.execute("""
+                UPDATE telegram_stats
+                   SET count = %s, latency_histogram = %s,
+                       latency_p50 = %s, latency_p95 = %s, latency_max = %s
+                 WHERE id = %s
+            """, (
+                (row_count or 0) + count,
+                json.dumps(histogram) if timed else None,
+                _percentile(histogram, max_ms, 0.5) if timed else None,
+                _percentile(histogram, max_ms, 0.95) if timed else None,
+                max_ms if timed else None,
+                row_id,
+            ))
+
+    @api.model
+    def _get_summary(self, hours=1):
+        """Totals and latency percentiles per metric over the last hours, this worker included"""
+        self._flush()
+        since = fields.Datetime.now() - timedelta(hours=hours)
+        summary = {}
+        for row in self.search_read([('bucket_start', '>=', since)],
+                                    ['metric', 'count', 'latency_histogram', 'latency_max']):
+            entry = summary.setdefault(row['metric'], {
+                'count': 0, 'histogram': [0] * (len(LATENCY_BINS) + 1), 'max': 0.0})
+            entry['count'] += row['count']
+            if row['latency_histogram']:
+                entry['histogram'] = [a + b for a, b in zip(entry['histogram'], json.loads(row['latency_histogram']))]
+                entry['max'] = max(entry['max'], row['latency_max'] or 0.0)
+        for entry in summary.values():
+            histogram = entry.pop('histogram')
+            entry['p50'] = _percentile(histogram, entry['max'], 0.5)
+            entry['p95'] = _percentile(histogram, entry['max'], 0.95)
+        return summary
+
+    @api.autovacuum
+    def _gc_old_stats(self):
+        """Drop stats older than the retention period"""
+        limit_date = fields.Datetime.now() - timedelta(days=STATS_RETENTION_DAYS)
+        self.search([('bucket_start', '<', limit_date)]).unlink()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""Bot message templates and static keyboards, compiled once per process
+
+Templates are ``str.format``-style sources parsed at import time. Values
+are escaped for Telegram's Markdown while rendering: ``{name}`` is plain
+text, ``{name!b}`` is bold text and ``{name!r}`` inserts an already
+rendered fragment (an optional line) as is.
+"""
+import json
+import re
+from string import Formatter
+
+# Characters with a meaning in Telegram's (legacy) Markdown
+_MARKDOWN_SPECIAL = re.compile(r'([_*`\[])')
+
+
+def escape_markdown(value):
+    """Escape text placed outside of a Markdown entity"""
+    return _MARKDOWN_SPECIAL.sub(r'\\\1', str(value))
+
+
+def markdown_bold(value):
+    """Bold text; special characters cannot be escaped inside an entity, so they are closed around"""
+    return '*' + _MARKDOWN_SPECIAL.sub(r'*\\\1*', str(value)) + '*'
+
+
+_CONVERSIONS = {
+    None: escape_markdown,
+    'b': markdown_bold,
+    'r': str,
+}
+
+
+class MessageTemplate:
+    """A pre-parsed message template rendered in a single pass"""
+
+    def __init__(self, source):
+        self.parts = [
+            (literal, field, _CONVERSIONS[conversion], spec)
+            for literal, field, spec, conversion in Formatter().parse(source)
+        ]
+
+    def render(self, **values):
+        chunks = []
+        for literal, field, convert, spec in self.parts:
+            chunks.append(literal)
+            if field is not None:
+                value = values[field]
+                chunks.append(convert(format(value, spec) if spec else value))
+        return ''.join(chunks)
+
+
+_SOURCES = {
+    'welcome': "Hello, {name}! 👋\n\nTelegram Task Manager bots.\n\nPlease choose:",
+    'menu': "📱 Main Menu:",
+    'report_prompt': "⚠️ **Report an issue**\n\nPlease describe the issue:",
+    'report_sent': "✅ **Report sent!**\n\nThe administrator will review it.",
+    'photo_report_sent': "✅ **Photo report sent!**\n\nThe administrator will review it.",
+    'photo_report_admin': "📸 **New photo report!**\n👤 {user}\n📝 {caption}",
+    'report_admin': "⚠️ **New report!**\n👤 {user}\n📝 {text}",
+
+    'vehicle_info': "🚗 {name!b}\n\n{plate!r}{driver!r}{type!r}{year!r}📊 Status: {status}\n{active_tasks!r}",
+    'vehicle_info_plate': "🔢 License Plate: {plate!b}\n",
+    'vehicle_info_driver': "👤 Driver: {driver}\n",
+    'vehicle_info_type': "🏷️ Type: {type}\n",
+    'vehicle_info_year': "📅 Year: {year}\n",
+    'vehicle_info_active_tasks': "📋 Active Tasks: {count}\n",
+
+    'tasks_empty': "📋 Not active tasks!\n\n🔍 **Debug info:**\nUser ID: {user_id}\nTelegram ID: {telegram_id}",
+    'tasks_header': "📋 **Your Tasks:**{paging!r}\n\n",
+    'tasks_paging': " ({page}/{page_count}, {total} total)",
+    'tasks_item': "{icon} {title!b}{plate!r}\n{description!r}\n",
+
+    'task_new': ("📋 **New task!**\n\n{title!b}\n{description!r}{vehicle!r}"
+                 "{priority_icon} Priority: {priority}\n{state_icon} Status: {state}\n{deadline!r}{progress!r}"),
+    'task_new_description': "📝 {description}\n\n",
+    'task_new_vehicle': "🚗 {name!b}{plate!r}{driver!r}\n",
+    'task_new_driver': "\n👤 Driver: {driver}",
+    'task_new_deadline': "⏰ Deadline: {deadline:%d.%m.%Y %H:%M}\n",
+    'task_new_progress': "📊 Progress: {progress:.0f}%\n",
+    'task_assigned_admin': ("📋 **New task assigned to employee!**\n\n👤 **Employee:** {user}\n📋 **Task:** {title}\n"
+                            "{description!r}{vehicle!r}{priority_icon} **Priority:** {priority}\n"
+                            "⏰ **Created:** {created:%d.%m.%Y %H:%M}"),
+
+    'task_done': ("✅ **Task completed!**\n\n📋 {title!b}\n{description!r}{vehicle!r}"
+                  "⏰ **Completed:** {completed:%d.%m.%Y %H:%M}\n👤 **User:** {user}"),
+    'task_done_admin': ("🎉 **TASK COMPLETEDS!**\n\n👤 **User:** {user}\n📋 **Task:** {title}\n{description!r}{vehicle!r}"
+                        "⚡ **Priority:** {priority_icon} {priority}\n⏰ **Completed:** {completed:%d.%m.%Y %H:%M}\n"
+                        "📊 **Status:** Completed"),
+
+    'digest_item': "📌 {title!b}{plate!r}\n{deadline!r}",
+    'digest_deadline': "⏰ {deadline:%d.%m.%Y %H:%M}\n",
+    'reminder_item': "📌 {title!b}\n⏰ {deadline:%d.%m.%Y %H:%M} (in {due_in})\n",
+
+    'admin_digest_header': "📬 **Admin digest:** {count} event(s) since {since:%d.%m.%Y %H:%M}\n\n",
+    'admin_digest_count': "{icon} {label}: {count}\n",
+    'admin_digest_item': "{icon} {time:%H:%M} {summary}\n",
+
+    'broadcast': "{icon} {title!b}\n\n{message}",
+
+    'execution_day_prompt': "🗓️ When can you complete {title!b}?\nReply with a date (e.g. '2025-08-15' or '15.08') or a day (e.g. 'Friday', 'tomorrow').",
+    'execution_day_invalid': "❓ I could not read {text} as a day in the future. Please try again (e.g. '15.08' or 'Friday').",
+    'execution_day_set': "✅ {title!b} is planned for {day:%A, %d.%m.%Y}.",
+
+    # Shared optional fragments
+    'description_line': "📝 {description}\n",
+    'description_field': "📝 **Description:** {description}\n",
+    'vehicle_field': "🚗 **Vehicle:** {name}{plate!r}\n",
+    'plate_suffix': " ({plate})",
+}
+
+_TEMPLATES = {name: MessageTemplate(source) for name, source in _SOURCES.items()}
+
+
+def render(name, **values):
+    """Render a named template"""
+    return _TEMPLATES[name].render(**values)
+
+
+def render_if(value, name, **values):
+    """Render an optional fragment, or '' when its value is empty"""
+    return _TEMPLATES[name].render(**values) if value else ''
+
+
+# (icon, label) per task priority and state
+PRIORITY_LABELS = {'0': ('🔵', 'Low'), '1': ('🟡', 'Normal'), '2': ('🟠', 'High'), '3': ('🔴', 'Urgent')}
+STATE_LABELS = {
+    'draft': ('📝', 'Draft'),
+    'in_progress': ('🔄', 'In Progress'),
+    'completed': ('✅', 'Completed'),
+    'cancelled': ('❌', 'Cancelled'),
+}
+
+
+def _markup(rows):
+    return json.dumps({'inline_keyboard': rows})
+
+
+# Static inline keyboards, serialized once
+WELCOME_MARKUP = _markup([
+    [{'text': '📋 Mani uzdevumi', 'callback_data': 'tasks'}],
+    [{'text': '⚠️ Ziņot problēmu', 'callback_data': 'report'}],
+    [{'text': '📱 Izvēlne', 'callback_data': 'menu'}],
+])
+MENU_MARKUP = _markup([
+    [{'text': '📋 Tasks', 'callback_data': 'tasks'}],
+    [{'text': '⚠️ Report Issue', 'callback_data': 'report'}],
+    [{'text': '📱 Main Menu', 'callback_data': 'menu'}],
+])
+# Last row of keyboards that are built per message
+HOME_BUTTON = {'text': '🏠 Main Menu', 'callback_data': 'menu'}
+HOME_MARKUP = _markup([
+    [HOME_BUTTON],
+])
+VEHICLE_MARKUP = _markup([
+    [{'text': '🏠 Main Menu', 'callback_data': 'menu'}],
+    [{'text': '📋 My Tasks', 'callback_data': 'tasks'}],
+])
+# Makes the Telegram client open a reply to the prompt
+FORCE_REPLY_MARKUP = json.dumps({'force_reply': True})
+TASK_DONE_MARKUP = _markup([
+    [{'text': '📋 Other Tasks', 'callback_data': 'tasks'}],
+    [{'text': '🏠 Main Menu', 'callback_data': 'menu'}],
+])
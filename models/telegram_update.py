@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+
+from odoo import models, fields, api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+# Pending updates looked at per scan of the inbound table
+SCAN_BATCH_SIZE = 100
+# Days processed update ids are kept for deduplication (Telegram retries for up to a day)
+PARAM_RETENTION_DAYS = 'telegram_task_manager.update_retention_days'
+DEFAULT_RETENTION_DAYS = 2
+# Threads processing stored updates in parallel (different chats) per cron run
+PARAM_WORKERS = 'telegram_task_manager.update_workers'
+DEFAULT_WORKERS = 4
+
+
+class TelegramUpdate(models.Model):
+    """Inbound Telegram updates, unique per update_id
+
+    In fast-ack mode the webhook stores the raw update here for the worker
+    cron, which processes different chats in parallel threads. In synchronous mode only the update_id is recorded, in the same
+    transaction as the processing, so Telegram's redeliveries are skipped.
+    """
+    _name = 'telegram.update'
+    _description = 'Telegram Inbound Update'
+    _order = 'update_id desc'
+    _rec_name = 'update_id'
+
+    service_id = fields.Many2one('telegram.service', string='Service', required=True, ondelete='cascade')
+    update_id = fields.Integer('Update ID', required=True)
+    chat_id = fields.Char('Chat ID')
+    payload = fields.Text('Payload')
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, index=True)
+    error = fields.Text('Error', readonly=True)
+    date_done = fields.Datetime('Processed At', readonly=True)
+
+    _sql_constraints = [
+        ('update_uniq', 'unique(service_id, update_id)', 'Telegram updates are stored only once.'),
+    ]
+
+    @api.model
+    def _get_chat_id(self, update):
+        """Chat the update belongs to, used to keep per-chat processing order"""
+        if 'message' in update:
+            return str(update['message']['chat']['id'])
+        if 'callback_query' in update and update['callback_query'].get('message'):
+            return str(update['callback_query']['message']['chat']['id'])
+        return None
+
+    @api.model
+    def _insert(self, service, update, state, payload=None, error=None):
+        """Record ``update``; return False if its update_id was already recorded"""
+        self.env.cr.execute("""
+            INSERT INTO telegram_update (service_id, update_id, chat_id, payload, state, error, date_done,
+                                         create_uid, create_date, write_uid, write_date)
+            VALUES (%s, %s, %s, %s, %s, %s, CASE WHEN %s = 'done' THEN now() at time zone 'UTC' END,
+                    %s, now() at time zone 'UTC', %s, now() at time zone 'UTC')
+            ON CONFLICT (service_id, update_id) DO NOTHING
+        """, (service.id, update['update_id'], self._get_chat_id(update), payload, state, error, state,
+              self.env.uid, self.env.uid))
+        return bool(self.env.cr.rowcount)
+
+    @api.model
+    def _store(self, service, update):
+        """Persist a raw update for background processing; duplicates are ignored"""
+        if self._insert(service, update, 'pending', json.dumps(update)):
+            self._trigger_processing()
+
+    @api.model
+    def _store_failed(self, service, update, error):
+        """Keep an update whose processing failed, so that action_retry can process it again"""
+        self._insert(service, update, 'failed', json.dumps(update), error)
+
+    @api.model
+    def _claim(self, service, update):
+        """Mark ``update`` as processed by the current transaction
+
+        Returns False for a redelivery of an update that was already
+        processed (or stored), which the caller must then skip. A concurrent
+        delivery of the same update waits on the unique index until the
+        first one commits or rolls back.
+        """
+        return self._insert(service, update, 'done')
+
+    @api.model
+    def _trigger_processing(self):
+        cron = self.env.ref(f'{self._module}.ir_cron_telegram_process_updates', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    @api.model
+    def _cron_process_updates(self):
+        """Drain pending updates with a pool of threads, chat by chat, in update_id order
+
+        Each thread processes one chat at a time in a cursor of its own,
+        claimed with a transaction-level advisory lock, so the threads (and
+        this cron running on other servers) never process two updates of
+        the same chat at once or out of order.
+        """
+        workers = max(1, int(self.env['ir.config_parameter'].sudo().get_param(PARAM_WORKERS, DEFAULT_WORKERS)))
+        registry = self.env.registry
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='telegram-update') as pool:
+            while True:
+                # Fresh snapshot: the threads commit their work in other cursors
+                self.env.cr.commit()
+                self.env.cr.execute("""
+                    SELECT DISTINCT ON (chat_id) chat_id, update_id FROM (
+                        SELECT chat_id, update_id FROM telegram_update
+                         WHERE state = 'pending'
+                         ORDER BY update_id
+                         LIMIT %s
+                    ) AS oldest
+                    ORDER BY chat_id, update_id
+                """, (SCAN_BATCH_SIZE,))
+                chats = [row[0] for row in sorted(self.env.cr.fetchall(), key=lambda row: row[1])]
+                if not chats:
+                    break
+                if not any(pool.map(partial(self._drain_chat, registry), chats)):
+                    # Every chat with pending updates is being drained by another server
+                    break
+
+    @api.model
+    def _drain_chat(self, registry, chat_id):
+        """Process the pending updates of one chat (in a pool thread); False if another worker has it"""
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            cr.execute("SELECT pg_try_advisory_xact_lock(hashtext(%s))", (f'telegram.update:{chat_id}',))
+            if not cr.fetchone()[0]:
+                return False
+            pending = env['telegram.update'].search([
+                ('state', '=', 'pending'),
+                ('chat_id', '=', chat_id),
+            ], order='update_id')
+            for update in pending:
+                update._process()
+            # Leaving the block commits, which releases the chat's advisory lock
+        return True
+
+    def _process(self):
+        """Run one stored update through the same pipeline as the webhook"""
+        self.ensure_one()
+        try:
+            with self.env.cr.savepoint():
+                self.service_id._process_update(json.loads(self.payload))
+        except Exception as e:
+            _logger.error("❌ Error processing Telegram update %s: %s", self.update_id, e)
+            self.write({'state': 'failed', 'error': str(e), 'date_done': fields.Datetime.now()})
+            return False
+        self.write({'state': 'done', 'date_done': fields.Datetime.now()})
+        return True
+
+    def action_retry(self):
+        """Queue failed updates for another processing attempt"""
+        self.write({'state': 'pending', 'error': False})
+        self._trigger_processing()
+
+    @api.autovacuum
+    def _gc_processed_updates(self):
+        """Keep the dedup index small: drop processed updates past the retention period"""
+        # Remember the newest update per service before its row goes away
+        self.env.cr.execute("""
+            UPDATE telegram_service s
+               SET last_update_id = u.max_update_id
+              FROM (SELECT service_id, MAX(update_id) AS max_update_id
+                      FROM telegram_update GROUP BY service_id) u
+             WHERE u.service_id = s.id
+               AND u.max_update_id > COALESCE(s.last_update_id, 0)
+        """)
+        days = int(self.env['ir.config_parameter'].sudo().get_param(PARAM_RETENTION_DAYS, DEFAULT_RETENTION_DAYS))
+        self.env.cr.execute(
+            "DELETE FROM telegram_update WHERE state = 'done' AND create_date < %s",
+            (fields.Datetime.now() - timedelta(days=days),),
+        )
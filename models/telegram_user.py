@@ -1,4 +1,53 @@
-from odoo import models, fields
+import logging
+import threading
+from collections import OrderedDict
+
+from psycopg2 import errors as pg_errors
+
+from odoo import models, fields, api
+from odoo.exceptions import MissingError
+from odoo.tools import SQL
+from odoo.tools.sql import table_exists
+
+_logger = logging.getLogger(__name__)
+
+# Size of the per-process telegram_id -> telegram.user id cache
+ID_CACHE_SIZE = 4096
+
+
+class TelegramIdCache:
+    """Thread-safe LRU mapping (database, telegram_id) to a telegram.user id
+
+    Entries are only hints: callers check the record still carries the
+    telegram_id, so changes made by other workers cannot cause wrong hits.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            user_id = self.entries.get(key)
+            if user_id is not None:
+                self.entries.move_to_end(key)
+            return user_id
+
+    def set(self, key, user_id):
+        with self.lock:
+            self.entries[key] = user_id
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+_id_cache = TelegramIdCache(ID_CACHE_SIZE)
+
 
 class TelegramUser(models.Model):
     _name = 'telegram.user'
@@ -10,3 +59,119 @@ class TelegramUser(models.Model):
     username = fields.Char('Username')
     is_admin = fields.Boolean('Is Admin', default=False)
     active = fields.Boolean('Active', default=True)
+
+    _sql_constraints = [
+        ('telegram_id_uniq', 'unique(telegram_id)', 'A user with this Telegram ID already exists.'),
+    ]
+
+    def _auto_init(self):
+        # Older databases may hold several users per Telegram ID, which keeps
+        # the unique constraint (and the upsert in _get_or_create) from working
+        self._merge_duplicate_telegram_ids()
+        return super()._auto_init()
+
+    def _merge_duplicate_telegram_ids(self):
+        """Merge users sharing a Telegram ID into the oldest one, re-pointing what references them"""
+        cr = self.env.cr
+        if not table_exists(cr, self._table):
+            return
+        cr.execute("""
+            SELECT ARRAY_AGG(id ORDER BY id) FROM telegram_user
+             GROUP BY telegram_id HAVING COUNT(*) > 1
+        """)
+        groups = [row[0] for row in cr.fetchall()]
+        if not groups:
+            return
+        # Every foreign key to telegram_user: many2one columns and many2many tables
+        cr.execute("""
+            SELECT cl.relname, att.attname
+              FROM pg_constraint con
+              JOIN pg_class cl ON cl.oid = con.conrelid
+              JOIN pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = con.conkey[1]
+             WHERE con.contype = 'f' AND con.confrelid = 'telegram_user'::regclass
+        """)
+        references = cr.fetchall()
+        for user_ids in groups:
+            keep_id, duplicate_ids = user_ids[0], tuple(user_ids[1:])
+            for table, column in references:
+                try:
+                    with cr.savepoint(flush=False):
+                        cr.execute(SQL("UPDATE %s SET %s = %s WHERE %s IN %s", SQL.identifier(table),
+                                       SQL.identifier(column), keep_id, SQL.identifier(column), duplicate_ids))
+                except pg_errors.UniqueViolation:
+                    # e.g. a many2many link the kept user already has
+                    cr.execute(SQL("DELETE FROM %s WHERE %s IN %s", SQL.identifier(table),
+                                   SQL.identifier(column), duplicate_ids))
+            cr.execute("UPDATE mail_message SET res_id = %s WHERE model = %s AND res_id IN %s",
+                       (keep_id, self._name, duplicate_ids))
+            cr.execute("DELETE FROM mail_followers WHERE res_model = %s AND res_id IN %s",
+                       (self._name, duplicate_ids))
+            cr.execute("""
+                UPDATE telegram_user
+                   SET is_admin = merged.is_admin, active = merged.active
+                  FROM (SELECT BOOL_OR(is_admin) AS is_admin, BOOL_OR(active) AS active
+                          FROM telegram_user WHERE id IN %s) AS merged
+                 WHERE id = %s
+            """, (tuple(user_ids), keep_id))
+            cr.execute("DELETE FROM telegram_user WHERE id IN %s", (duplicate_ids,))
+            _logger.info("Merged Telegram users %s into %s (same Telegram ID)", list(duplicate_ids), keep_id)
+
+    def write(self, vals):
+        if 'telegram_id' in vals:
+            self._evict_cached_ids()
+        return super().write(vals)
+
+    def unlink(self):
+        self._evict_cached_ids()
+        return super().unlink()
+
+    def _evict_cached_ids(self):
+        dbname = self.env.cr.dbname
+        for user in self:
+            _id_cache.discard((dbname, user.telegram_id))
+
+    @api.model
+    def _find_by_telegram_id(self, telegram_id):
+        """Return the user (archived ones included) with this Telegram ID, or an empty recordset"""
+        telegram_id = str(telegram_id)
+        key = (self.env.cr.dbname, telegram_id)
+        users = self.with_context(active_test=False)
+        user_id = _id_cache.get(key)
+        if user_id:
+            user = users.browse(user_id)
+            try:
+                if user.telegram_id == telegram_id:
+                    return user
+            except MissingError:
+                pass
+            _id_cache.discard(key)
+        user = users.search([('telegram_id', '=', telegram_id)], limit=1)
+        if user:
+            _id_cache.set(key, user.id)
+        return user
+
+    @api.model
+    def _get_or_create(self, telegram_id, name, username=None, is_admin=False):
+        """Return ``(user, created)`` for a Telegram ID, creating the user if needed
+
+        The insert relies on the unique index: when a concurrent transaction
+        creates the same user first, PostgreSQL raises a serialization
+        failure and the caller's transaction must be retried.
+        """
+        user = self._find_by_telegram_id(telegram_id)
+        if user:
+            return user, False
+        self.env.flush_all()
+        self.env.cr.execute("""
+            INSERT INTO telegram_user (name, telegram_id, username, is_admin, active,
+                                       create_uid, create_date, write_uid, write_date)
+            VALUES (%s, %s, %s, %s, true, %s, now() at time zone 'UTC', %s, now() at time zone 'UTC')
+            ON CONFLICT (telegram_id) DO NOTHING
+            RETURNING id
+        """, (name, str(telegram_id), username or None, is_admin, self.env.uid, self.env.uid))
+        row = self.env.cr.fetchone()
+        if not row:
+            # Created (and committed) since our search ran
+            return self._find_by_telegram_id(telegram_id), False
+        _id_cache.set((self.env.cr.dbname, str(telegram_id)), row[0])
+        return self.with_context(active_test=False).browse(row[0]), True
@@ -1 +1,2 @@
 from . import quick_task_wizard
+from . import telegram_notify_wizard
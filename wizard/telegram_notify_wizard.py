@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+from ..models.telegram_broadcast import BROADCAST_TYPES
+
+
+class TelegramNotifyWizard(models.TransientModel):
+    """Send a Telegram message to all or selected users as a broadcast"""
+    _name = 'telegram.notify.wizard'
+    _description = 'Telegram Notification Wizard'
+
+    send_to_all = fields.Boolean(string='Send to All Active Users', default=True)
+    user_ids = fields.Many2many('telegram.user', string='Recipients')
+    notification_type = fields.Selection(BROADCAST_TYPES, string='Type', default='info', required=True)
+    title = fields.Char(string='Title', required=True, default=lambda self: _('Announcement'))
+    message = fields.Text(string='Message', required=True)
+
+    @api.model
+    def default_get(self, fields_list):
+        values = super().default_get(fields_list)
+        if self.env.context.get('active_model') == 'telegram.user' and self.env.context.get('active_ids'):
+            values['send_to_all'] = False
+            values['user_ids'] = [(6, 0, self.env.context['active_ids'])]
+        return values
+
+    def action_send_notification(self):
+        """Create the broadcast and start sending it in the background"""
+        self.ensure_one()
+        if not self.send_to_all and not self.user_ids:
+            raise UserError(_("Select at least one recipient!"))
+
+        domain = [('active', '=', True)] if self.send_to_all else [('id', 'in', self.user_ids.ids)]
+        broadcast = self.env['telegram.broadcast'].create({
+            'name': self.title,
+            'message': self.message,
+            'broadcast_type': self.notification_type,
+            'user_domain': repr(domain),
+        })
+        broadcast.action_start()
+
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Broadcast'),
+            'res_model': 'telegram.broadcast',
+            'res_id': broadcast.id,
+            'view_mode': 'form',
+            'target': 'current'
+        }